@@ -17,13 +17,15 @@ def topo_downstream_modules(sys):
         if module not in in_degree:
             in_degree[module] = 0
 
+    # Membership set, so edge discovery stays linear in the number of upstream links
+    downstream_set = set(downstreams)
     for module in downstreams:
         # Get upstream modules (modules this module depends on)
         upstreams = get_upstreams(module)
 
         # For each upstream, if it's also a downstream, add dependency
         for upstream in upstreams:
-            if upstream in downstreams:
+            if upstream in downstream_set:
                 # upstream -> module (module depends on upstream)
                 graph[upstream].append(module)
                 in_degree[module] += 1
@@ -55,14 +55,17 @@ def codegen_slice(node: Slice, module_ctx):
     r = node.r.value.value
     dtype = node.dtype
     num_bits = r - l + 1
-    mask_bits = "1" * num_bits
+    # The mask is a compile-time constant, so it is emitted as a literal rather than
+    # parsed from a binary string every time the slice executes.
+    mask = (1 << num_bits) - 1
 
     if l < 64 and r < 64:
         result_a = f'''let a = ValueCastTo::<u64>::cast(&{a});
-        let mask = u64::from_str_radix("{mask_bits}", 2).unwrap();'''
+        let mask: u64 = {mask:#x}u64;'''
     else:
+        mask_bytes = ", ".join(f"{byte:#04x}" for byte in mask.to_bytes((num_bits + 7) // 8, "big"))
         result_a = f'''let a = ValueCastTo::<BigUint>::cast(&{a});
-        let mask = BigUint::parse_bytes("{mask_bits}".as_bytes(), 2).unwrap();'''
+        let mask = BigUint::from_bytes_be(&[{mask_bytes}]);'''
 
     return f"""{{
                 {result_a}
@@ -112,12 +115,16 @@ assert!(cond.count_ones() == 1, "Select1Hot: condition is not 1-hot");''']
     return "".join(result)
 
 
+# Casts that lower to a plain ``ValueCastTo`` in the simulator.
+_CAST_PASSTHROUGH = (Cast.ZEXT, Cast.BITCAST, Cast.SEXT)
+
+
 def codegen_cast(node: Cast, module_ctx):
     """Generate code for cast operations."""
     dest_dtype = node.dtype
     a = dump_rval_ref(module_ctx, node.x)
 
-    if node.opcode in [Cast.ZEXT, Cast.BITCAST, Cast.SEXT]:
+    if node.opcode in _CAST_PASSTHROUGH:
         return f"ValueCastTo::<{dtype_to_rust_type(dest_dtype)}>::cast(&{a})"
 
     return None
@@ -143,6 +150,11 @@ _EXPR_CODEGEN_DISPATCH = {
 }
 
 
+# Snapshot of the declared entries; subclass lookups scan this instead of the live
+# table, which grows as resolved subclasses are cached below.
+_EXPR_CODEGEN_BASES = tuple(_EXPR_CODEGEN_DISPATCH.items())
+
+
 def codegen_expr(node, module_ctx):
     """Generate code for an expression node.
 
@@ -153,16 +165,16 @@ def codegen_expr(node, module_ctx):
 
     # Try exact match first
     codegen_func = _EXPR_CODEGEN_DISPATCH.get(node_type)
-    if codegen_func is not None:
-        if isinstance(node, ArrayWrite):
-            return codegen_func(node, module_ctx, module_ctx.name)
-        return codegen_func(node, module_ctx)
-
-    # Fall back to isinstance check for subclasses
-    for base_type, func in _EXPR_CODEGEN_DISPATCH.items():
-        if isinstance(node, base_type):
-            if isinstance(node, ArrayWrite):
-                return func(node, module_ctx, module_ctx.name)
-            return func(node, module_ctx)
-
-    return None
+    if codegen_func is None:
+        # Fall back to isinstance check for subclasses, and remember the answer so
+        # later nodes of the same type take the exact-match path.
+        for base_type, func in _EXPR_CODEGEN_BASES:
+            if issubclass(node_type, base_type):
+                codegen_func = _EXPR_CODEGEN_DISPATCH[node_type] = func
+                break
+        else:
+            return None
+
+    if codegen_func is codegen_array_write:
+        return codegen_func(node, module_ctx, module_ctx.name)
+    return codegen_func(node, module_ctx)
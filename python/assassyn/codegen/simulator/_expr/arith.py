@@ -9,10 +9,14 @@ from ....ir.expr import BinaryOp, UnaryOp
 from ..utils import dtype_to_rust_type
 from ..node_dumper import dump_rval_ref
 
+# Opcode -> Rust operator tables, bound at import so each node does one dict lookup.
+_BINARY_OPERATORS = BinaryOp.OPERATORS
+_UNARY_OPERATORS = UnaryOp.OPERATORS
+
 
 def codegen_binary_op(node: BinaryOp, module_ctx):
     """Generate code for binary operations."""
-    binop = BinaryOp.OPERATORS[node.opcode]
+    binop = _BINARY_OPERATORS[node.opcode]
 
     if node.is_comparative():
         rust_ty = node.lhs.dtype
@@ -63,5 +67,5 @@ def codegen_binary_op(node: BinaryOp, module_ctx):
 def codegen_unary_op(node: UnaryOp, module_ctx):
     """Generate code for unary operations."""
     operand = dump_rval_ref(module_ctx, node.x)
-    uniop = UnaryOp.OPERATORS[node.opcode]
+    uniop = _UNARY_OPERATORS[node.opcode]
     return f"{uniop}{operand}"
@@ -2,39 +2,101 @@
 
 from __future__ import annotations
 
+import functools
+import io
 import os
 import shutil
 import subprocess
+import threading
+import time
 import typing
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from .external import collect_exposure_flags
 from .modules import dump_modules
-from .simulator import dump_simulator
+from .port_mapper import reset_port_manager
+from .simulator import analyze_and_register_ports, dump_simulator
+from .utils import write_if_changed
 from .verilator import emit_external_sv_ffis
 
-from ...utils import repo_path
+from ...utils import FORMAT_PENDING, repo_path, wait_pending_format
 
-if typing.TYPE_CHECKING:
-    from ...builder import SysBuilder
+
+_TEMPLATE_MAIN_RS = Path(__file__).resolve().parent / "template" / "main.rs"
+
+
+@functools.lru_cache(maxsize=1)
+def _runtime_crate_path() -> Path:
+    """Return the path to the in-repo ``sim-runtime`` crate."""
+    return Path(repo_path()) / "tools" / "rust-sim-runtime"
+
+
+@functools.lru_cache(maxsize=1)
+def _rustfmt_config_path() -> typing.Optional[Path]:
+    """Return the repository ``rustfmt.toml``, or None when it is absent."""
+    path = Path(repo_path()) / "rustfmt.toml"
+    return path if path.is_file() else None
+
+
+@functools.lru_cache(maxsize=None)
+def _template_bytes(path: Path) -> bytes:
+    """Return the contents of an immutable template file, read once per process."""
+    return path.read_bytes()
+
+
+@functools.lru_cache(maxsize=4096)
+def _crate_rel_path(target: str, base: str) -> str:
+    """Return ``target`` relative to ``base`` with forward slashes, as Cargo expects."""
+    return os.path.relpath(target, base).replace(os.sep, '/')
 
 
 def _write_manifest(simulator_path: Path, sys_name: str, ffi_specs) -> Path:
     """Write the Cargo manifest for the generated simulator crate."""
     manifest_path = simulator_path / "Cargo.toml"
-    runtime_path = Path(repo_path()) / "tools" / "rust-sim-runtime"
-    with open(manifest_path, 'w', encoding="utf-8") as cargo:
-        cargo.write("[package]\n")
-        cargo.write(f'name = "{sys_name}_simulator"\n')
-        cargo.write('version = "0.1.0"\n')
-        cargo.write('edition = "2021"\n')
-        cargo.write('[dependencies]\n')
-        cargo.write(f'sim-runtime = {{ path = "{runtime_path}" }}\n')
-        for spec in ffi_specs:
-            rel_path = os.path.relpath(spec.crate_path, simulator_path).replace(os.sep, '/')
-            cargo.write(f'{spec.crate_name} = {{ path = "{rel_path}" }}\n')
+    runtime_path = _runtime_crate_path()
+    lines = [
+        "[package]\n",
+        f'name = "{sys_name}_simulator"\n',
+        'version = "0.1.0"\n',
+        'edition = "2021"\n',
+        "[dependencies]\n",
+        f'sim-runtime = {{ path = "{runtime_path}" }}\n',
+    ]
+    # Specs of identical external designs share one crate; list it once.
+    crates = {spec.crate_name: spec.crate_path for spec in ffi_specs}
+    for crate_name, crate_path in crates.items():
+        rel_path = _crate_rel_path(str(crate_path), str(simulator_path))
+        lines.append(f'{crate_name} = {{ path = "{rel_path}" }}\n')
+    write_if_changed(manifest_path, "".join(lines).encode("utf-8"))
     return manifest_path
 
 
+def _discard_directory(path: Path) -> None:
+    """Move ``path`` out of the way and delete it on a background thread.
+
+    The rename is a single syscall on the same filesystem, so the caller can
+    recreate ``path`` immediately while the old tree is removed concurrently.
+    """
+    trash = path.with_name(f"{path.name}.old.{os.getpid()}.{time.time_ns()}")
+    try:
+        os.rename(path, trash)
+    except OSError:
+        shutil.rmtree(path)
+        return
+    # Not a daemon: interpreter shutdown waits for the removal to finish.
+    threading.Thread(
+        target=shutil.rmtree, args=(trash,), kwargs={"ignore_errors": True}
+    ).start()
+
+
+def _write_simulator_rs(sys, config, path: Path, exposure_flags, port_info) -> None:
+    """Generate ``src/simulator.rs`` into ``path``."""
+    fd = io.StringIO()
+    dump_simulator(sys, config, fd, exposure_flags, port_info)
+    write_if_changed(path, fd.getvalue().encode("utf-8"))
+
+
 def elaborate_impl(sys, config):
     """Internal implementation of the elaborate function.
 
@@ -45,14 +107,18 @@ def elaborate_impl(sys, config):
         or config.get('dirname')
         or f"{sys.name}_simulator"
     )
-    simulator_path = Path(config.get('path', os.getcwd())) / simulator_dirname
-    verilator_root = simulator_path / config.get('verilator_dirname', f"{sys.name}_verilator")
+    workspace = Path(config.get('path', os.getcwd()))
+    simulator_path = workspace / simulator_dirname
+    # The Verilator workspace sits next to the simulator directory, not inside it,
+    # so discarding the simulator below keeps the crates that are still current.
+    verilator_root = workspace / config.get('verilator_dirname', f"{sys.name}_verilator")
 
     if simulator_path.exists() and config.get('override_dump', True):
-        shutil.rmtree(simulator_path)
+        _discard_directory(simulator_path)
 
     simulator_path.mkdir(parents=True, exist_ok=True)
-    (simulator_path / "src").mkdir(exist_ok=True)
+    src_dir = simulator_path / "src"
+    src_dir.mkdir(exist_ok=True)
 
     ffi_specs = emit_external_sv_ffis(sys, config, simulator_path, verilator_root)
 
@@ -60,17 +126,34 @@ def elaborate_impl(sys, config):
 
     manifest_path = _write_manifest(simulator_path, sys.name, ffi_specs)
 
-    shutil.copy(Path(repo_path()) / "rustfmt.toml", simulator_path / "rustfmt.toml")
-
-    dump_modules(sys, simulator_path / "src" / "modules")
-
-    with open(simulator_path / "src/simulator.rs", 'w', encoding='utf-8') as fd:
-        dump_simulator(sys, config, fd)
-
-    shutil.copy(
-        Path(__file__).resolve().parent / "template" / "main.rs",
-        simulator_path / "src/main.rs"
-    )
+    rustfmt_config = _rustfmt_config_path()
+    if rustfmt_config is not None:
+        write_if_changed(simulator_path / "rustfmt.toml", _template_bytes(rustfmt_config))
+
+    # Assign every array write port before fanning out, so that the module and
+    # simulator generators only read the shared port manager concurrently.
+    port_info = analyze_and_register_ports(sys)
+    # Both generator threads consult the same exposure answers; compute them once.
+    exposure_flags = collect_exposure_flags(sys)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        jobs = [
+            pool.submit(dump_modules, sys, src_dir / "modules", exposure_flags),
+            pool.submit(
+                _write_simulator_rs,
+                sys,
+                config,
+                src_dir / "simulator.rs",
+                exposure_flags,
+                port_info,
+            ),
+        ]
+        write_if_changed(
+            src_dir / "main.rs",
+            _template_bytes(_TEMPLATE_MAIN_RS),
+        )
+        for job in jobs:
+            job.result()
 
     return manifest_path
 
@@ -78,20 +161,27 @@ def elaborate_impl(sys, config):
 def elaborate(sys, **config):
     """Generate a Rust-based simulator for the given Assassyn system."""
 
-    # pylint: disable=import-outside-toplevel
-    from .port_mapper import reset_port_manager
+    # A formatter still running from an earlier elaboration may be rewriting the
+    # directory this one is about to replace.
+    wait_pending_format()
     reset_port_manager()
 
     manifest_path = elaborate_impl(sys, config)
 
+    if not config.get('pretty_printer', True):
+        return manifest_path
+
+    # Formatting is cosmetic, so let it run in the background; the cargo helpers
+    # in utils wait for it before touching the crate. The formatted files no longer
+    # match the raw generator output, so write_if_changed only keeps mtimes when
+    # pretty_printer is off.
     try:
-        subprocess.run(
+        FORMAT_PENDING.append(subprocess.Popen(  # pylint: disable=consider-using-with
             ["cargo", "fmt", "--manifest-path", str(manifest_path)],
-            check=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
-        )
-    except (subprocess.CalledProcessError, FileNotFoundError):
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        ))
+    except FileNotFoundError:
         print("Warning: Failed to format code with cargo fmt")
 
     return manifest_path
@@ -2,11 +2,11 @@
 
 from __future__ import annotations
 
-from typing import Dict, Iterable, Set, Tuple
+from typing import Dict, Iterable, Optional, Set, Tuple
 
 from ...analysis import expr_externally_used
 from ...ir.expr import Expr
-from ...ir.module import Downstream, Module
+from ...ir.module import Module
 from ...ir.module.external import ExternalSV
 from ...ir.visitor import Visitor
 from ...utils import namify
@@ -18,55 +18,67 @@ def external_handle_field(module_name: str) -> str:
     return f"{namify(module_name)}_ffi"
 
 
-class _ModuleValueExposureCollector(Visitor):
-    """Collect expressions that need simulator-side caching."""
+def collect_exposure_flags(sys) -> Dict[Expr, bool]:
+    """Evaluate ``expr_externally_used`` once for every body expression in *sys*.
 
-    def __init__(self):
-        super().__init__()
-        self.exprs: Set[Expr] = set()
+    The module elaborator and ``gather_expr_validities`` both ask the same question
+    of the same nodes; computing the answers up front lets each compile pay for the
+    user scan only once.
+    """
 
-    def visit_expr(self, node: Expr) -> None:
-        if expr_externally_used(node, True):
-            self.exprs.add(node)
+    flags: Dict[Expr, bool] = {}
+    for module in list(sys.modules) + list(sys.downstreams):
+        body = getattr(module, "body", None)
+        if not body or not isinstance(body, list):
+            continue
+        for expr in body:
+            if isinstance(expr, Expr) and expr not in flags:
+                flags[expr] = expr_externally_used(expr, True)
+    return flags
+
+
+def is_exposed(expr: Expr, flags: Optional[Dict[Expr, bool]] = None) -> bool:
+    """Return the cached exposure flag for *expr*, computing it when absent."""
+
+    if flags is not None:
+        cached = flags.get(expr)
+        if cached is not None:
+            return cached
+    return expr_externally_used(expr, True)
 
 
-def collect_module_value_exposures(module: Module) -> Set[Expr]:
+def collect_module_value_exposures(
+    module: Module, flags: Optional[Dict[Expr, bool]] = None
+) -> Set[Expr]:
     """Collect expressions that require simulator-side caching for a module."""
 
     body = getattr(module, "body", None)
-    if not body:
+    if not body or not isinstance(body, list):
         return set()
 
-    collector = _ModuleValueExposureCollector()
-    collector.current_module = module
-    collector.visit_module(module)
-    return collector.exprs
+    # Module bodies are flat expression lists, so one pass over the list sees every
+    # expression exactly once.
+    return {expr for expr in body if isinstance(expr, Expr) and is_exposed(expr, flags)}
 
-def gather_expr_validities(sys) -> Tuple[Set[Expr], Dict[Module, Set[Expr]]]:
+def gather_expr_validities(
+    sys, exposure_flags: Optional[Dict[Expr, bool]] = None
+) -> Tuple[Set[Expr], Dict[Module, Set[Expr]]]:
     """Aggregate expressions whose values must be cached on the simulator."""
 
     exprs: Set[Expr] = set()
     module_expr_map: Dict[Module, Set[Expr]] = {}
 
-    def record(module: Module, expr: Expr) -> None:
-        exprs.add(expr)
-        module_expr_map.setdefault(module, set()).add(expr)
-
     modules: Iterable[Module] = list(sys.modules) + list(sys.downstreams)
     for module in modules:
-        if isinstance(module, Downstream):
-            for expr in module.externals:
-                if isinstance(expr, Expr):
-                    record(module, expr)
-
-        for expr in collect_module_value_exposures(module):
-            record(module, expr)
-
+        # One body pass plus one pass over the externals; downstream externals are
+        # covered by the generic externals check.
+        module_exprs = collect_module_value_exposures(module, exposure_flags)
         externals = getattr(module, "externals", None)
         if externals:
-            for expr in externals:
-                if isinstance(expr, Expr):
-                    record(module, expr)
+            module_exprs.update(expr for expr in externals if isinstance(expr, Expr))
+        if module_exprs:
+            exprs.update(module_exprs)
+            module_expr_map[module] = module_exprs
 
     return exprs, module_expr_map
 
@@ -124,10 +136,12 @@ def collect_external_classes(external_intrinsics):
 
 __all__ = [
     "collect_external_intrinsics",
+    "collect_exposure_flags",
     "collect_external_classes",
     "collect_module_value_exposures",
     "external_handle_field",
     "gather_expr_validities",
     "has_module_body",
+    "is_exposed",
     "is_stub_external",
 ]
@@ -7,13 +7,14 @@ import typing
 from ...ir.visitor import Visitor
 from ...ir.dtype import RecordValue
 from ...ir.expr import Expr
-from ...ir.expr.intrinsic import Intrinsic as IRIntrinsic
+from ...ir.expr.intrinsic import ExternalIntrinsic, Intrinsic as IRIntrinsic
 from ...ir.memory.dram import DRAM
 from ...utils import namify
 from .node_dumper import dump_rval_ref
-from ...analysis import expr_externally_used
+from ._expr import codegen_expr
 from ...ir.module.external import ExternalSV
-from .external import has_module_body
+from .external import has_module_body, is_exposed
+from .utils import int_imm_dumper_impl, write_if_changed
 
 if typing.TYPE_CHECKING:
     from ...ir.module import Module
@@ -23,10 +24,13 @@ if typing.TYPE_CHECKING:
 class ElaborateModule(Visitor):  # pylint: disable=too-many-instance-attributes
     """Visitor for elaborating modules with ExternalSV support."""
 
-    def __init__(self, sys):
+    def __init__(self, sys, exposure_flags=None):
         super().__init__()
         self.sys = sys
+        self.exposure_flags = exposure_flags
         self.indent = 0
+        # Whitespace prefixes indexed by indent width, shared by every emitted line.
+        self._indent_strs = [" " * i for i in range(64)]
         self.module_name = ""
         self.module_ctx = None
 
@@ -52,12 +56,10 @@ class ElaborateModule(Visitor):  # pylint: disable=too-many-instance-attributes
 
     def visit_expr(self, node: Expr):  # pylint: disable=too-many-locals
         """Visit an expression and generate its implementation."""
-        from ._expr import codegen_expr  # pylint: disable=import-outside-toplevel
-
 
         id_and_exposure = None
         if node.is_valued():
-            need_exposure = expr_externally_used(node, True)
+            need_exposure = is_exposed(node, self.exposure_flags)
             id_expr = namify(node.as_operand())
             id_and_exposure = (id_expr, need_exposure)
 
@@ -67,7 +69,7 @@ class ElaborateModule(Visitor):  # pylint: disable=too-many-instance-attributes
             IRIntrinsic.PUSH_CONDITION,
             IRIntrinsic.POP_CONDITION,
         ):
-            indent_str = " " * self.indent
+            indent_str = self._indent_str()
             if node.opcode == IRIntrinsic.PUSH_CONDITION:
                 cond_val = dump_rval_ref(self.module_ctx, node.args[0])
                 result = f"{indent_str}if {cond_val} {{\n"
@@ -76,45 +78,52 @@ class ElaborateModule(Visitor):  # pylint: disable=too-many-instance-attributes
                 return result
             # POP_CONDITION closes the current scope
             self.indent = max(0, self.indent - 2)
-            return f"{' ' * self.indent}}}\n"
+            return f"{self._indent_str()}}}\n"
 
         code = codegen_expr(node, self.module_ctx)
 
-        indent_str = " " * self.indent
-        result = ""
-
-        # Add location comment if available
-        if hasattr(node, 'loc') and node.loc:
-            result += f"{indent_str}// @{node.loc}\n"
+        indent_str = self._indent_str()
+        parts = []
 
-        if id_and_exposure:
+        if id_and_exposure and code:
+            # Valued expressions are emitted as a binding; the location comment is
+            # not repeated in front of the ``let``.
             id_expr, need_exposure = id_and_exposure
-            if code:
-                lines = [f"{indent_str}let {id_expr} = {{ {code} }};"]
-                # Skip validity tracking for ExternalIntrinsic
-                # pylint: disable=import-outside-toplevel
-                from ...ir.expr.intrinsic import ExternalIntrinsic
-                if need_exposure and not isinstance(node, ExternalIntrinsic):
-                    lines.append(f"{indent_str}sim.{id_expr}_value = Some({id_expr}.clone());")
-                result = "\n".join(lines) + "\n"
+            parts.append(f"{indent_str}let {id_expr} = {{ {code} }};\n")
+            # Skip validity tracking for ExternalIntrinsic
+            if need_exposure and not isinstance(node, ExternalIntrinsic):
+                parts.append(f"{indent_str}sim.{id_expr}_value = Some({id_expr}.clone());\n")
         else:
+            # Add location comment if available
+            if node.loc:
+                parts.append(f"{indent_str}// @{node.loc}\n")
             if code:
-                result += f"{indent_str}{code};\n"
+                parts.append(f"{indent_str}{code};\n")
 
-        return result
+        return "".join(parts)
+
+    def _indent_str(self) -> str:
+        """Return the cached whitespace prefix for the current indent."""
+        strs = self._indent_strs
+        while len(strs) <= self.indent:
+            strs.append(" " * len(strs))
+        return strs[self.indent]
 
     def _emit_body(self, body_nodes):
         result = []
+        # The builder appends an expression only when it first receives a parent, so
+        # expressions never repeat in a body; only wrapper values such as RecordValue
+        # can be inserted more than once and need de-duplication.
         visited = set()
 
         for elem in body_nodes:
-            elem_id = id(elem)
-            if elem_id in visited:
-                continue
-            visited.add(elem_id)
             if isinstance(elem, Expr):
                 result.append(self.visit_expr(elem))
             elif isinstance(elem, RecordValue):
+                elem_id = id(elem)
+                if elem_id in visited:
+                    continue
+                visited.add(elem_id)
                 result.append(self.visit_expr(elem.value()))
             else:
                 raise ValueError(f"Unexpected reference type: {type(elem).__name__}")
@@ -122,10 +131,12 @@ class ElaborateModule(Visitor):  # pylint: disable=too-many-instance-attributes
         return "".join(result)
 
     def visit_int_imm(self, int_imm):
-        """Render integer immediates as Rust ``ValueCastTo`` expressions."""
-        ty = dump_rval_ref(self.module_ctx, int_imm.dtype)
-        value = int_imm.value
-        return f"ValueCastTo::<{ty}>::cast(&{value})"
+        """Render integer immediates as typed Rust literals.
+
+        Shares ``int_imm_dumper_impl`` with the operand dumper, so native widths become
+        suffixed literals and only wider values go through ``ValueCastTo``.
+        """
+        return int_imm_dumper_impl(int_imm.dtype, int_imm.value)
 
     def visit_external_module(self, node: ExternalSV):
         """Emit a stub implementation for an external module."""
@@ -139,15 +150,8 @@ class ElaborateModule(Visitor):  # pylint: disable=too-many-instance-attributes
         )
 
 
-def dump_modules(sys: SysBuilder, modules_dir):
-    """Generate individual module files in the modules/ directory."""
-    modules_dir.mkdir(exist_ok=True)
-
-    em = ElaborateModule(sys)
-
-    mod_rs_path = modules_dir / "mod.rs"
-    with open(mod_rs_path, 'w', encoding="utf-8") as mod_fd:
-        mod_fd.write("""use sim_runtime::*;
+# Fixed preludes of ``modules/mod.rs`` and of every ``modules/<module>.rs``, encoded once.
+_MOD_RS_PRELUDE = b"""use sim_runtime::*;
 use super::simulator::Simulator;
 use std::collections::VecDeque;
 use sim_runtime::num_bigint::{BigInt, BigUint};
@@ -155,23 +159,18 @@ use sim_runtime::libloading::{Library, Symbol};
 use std::ffi::{CString, c_char, c_float, c_longlong, c_void};
 use std::sync::Arc;
 
-""")
-
-        for module in sys.modules[:] + sys.downstreams[:]:
-            module_name = namify(module.name)
-            mod_fd.write(f"pub mod {module_name};\n")
+"""
 
-            module_file_path = modules_dir / f"{module_name}.rs"
-            with open(module_file_path, 'w', encoding="utf-8") as module_fd:
-                module_fd.write("""use sim_runtime::*;
+_MODULE_RS_PRELUDE = b"""use sim_runtime::*;
 use sim_runtime::num_bigint::{BigInt, BigUint};
 use crate::simulator::Simulator;
 use std::ffi::c_void;
 
-""")
+"""
 
-                if isinstance(module, DRAM):
-                    module_fd.write(f"""pub extern "C" fn callback_of_{module_name}(
+
+# Ramulator2 completion callback emitted for every DRAM module.
+_DRAM_CALLBACK_TEMPLATE = """pub extern "C" fn callback_of_{module_name}(
     req: *mut Request, ctx: *mut c_void) {{
     unsafe {{
         let req = &*req;
@@ -203,9 +202,31 @@ use std::ffi::c_void;
     }}
 }}
 
-""")
+"""
+
+
+def dump_modules(sys: SysBuilder, modules_dir, exposure_flags=None):
+    """Generate individual module files in the modules/ directory."""
+    modules_dir.mkdir(exist_ok=True)
+
+    em = ElaborateModule(sys, exposure_flags)
+
+    # Each file is assembled in memory and written once.
+    mod_rs = []
+
+    for module in sys.modules + sys.downstreams:
+        module_name = namify(module.name)
+        mod_rs.append(f"pub mod {module_name};\n")
+
+        module_rs = []
+        if isinstance(module, DRAM):
+            module_rs.append(_DRAM_CALLBACK_TEMPLATE.format(module_name=module_name))
+        module_rs.append(em.visit_module(module))
+        write_if_changed(
+            modules_dir / f"{module_name}.rs",
+            _MODULE_RS_PRELUDE + "".join(module_rs).encode("utf-8"),
+        )
 
-                module_code = em.visit_module(module)
-                module_fd.write(module_code)
+    write_if_changed(modules_dir / "mod.rs", _MOD_RS_PRELUDE + "".join(mod_rs).encode("utf-8"))
 
     return True
@@ -32,11 +32,12 @@ def _handle_module(unwrapped, _module_ctx):
 def _handle_expr(unwrapped, module_ctx):
     """Handle Expr nodes."""
     # Figure out the ID format based on context
+    # The operand name is computed once and shared by every branch.
+    ref = namify(unwrapped.as_operand())
     parent_module = getattr(unwrapped, 'parent', None)
     if module_ctx != parent_module:
-        raw = namify(unwrapped.as_operand())
-        field_id = f"{raw}_value"
-        panic_log = f"Value {raw} invalid!"
+        field_id = f"{ref}_value"
+        panic_log = f"Value {ref} invalid!"
         # Return as a block expression that evaluates to the value
         return f"""{{
                 if let Some(x) = &sim.{field_id} {{
@@ -46,14 +47,13 @@ def _handle_expr(unwrapped, module_ctx):
                 }}
             }}.clone()"""
 
-    ref = namify(unwrapped.as_operand())
     if isinstance(unwrapped, PureIntrinsic) and unwrapped.opcode == PureIntrinsic.FIFO_PEEK:
         return f"{ref}.clone().unwrap()"
 
     dtype = unwrapped.dtype
     if dtype.bits <= 64:
         # Simple value
-        return namify(ref)
+        return ref
 
     # Large value needs cloning
     return f"{ref}.clone()"
@@ -59,9 +59,10 @@ def analyze_and_register_ports(sys: SysBuilder) -> None:
             # MEM_WRITE intrinsic was removed, so no need to handle it
 
         def visit_module(self, node):
-            """Visit modules to collect DRAM instances."""
+            """Visit modules to collect DRAM instances and walk their bodies."""
             if isinstance(node, DRAM):
                 dram_modules.append(node)
+            super().visit_module(node)
 
     visitor = PortRegistrationVisitor()
     visitor.visit_system(sys)
@@ -72,7 +73,7 @@ def analyze_and_register_ports(sys: SysBuilder) -> None:
 
 @enforce_type
 def dump_simulator( #pylint: disable=too-many-locals, too-many-branches, too-many-statements
-                   sys: SysBuilder, config, fd):
+                   sys: SysBuilder, config, fd, exposure_flags=None, port_info=None):
     """Generate the simulator module.
 
     This matches the Rust function in src/backend/simulator/elaborate.rs
@@ -86,10 +87,17 @@ def dump_simulator( #pylint: disable=too-many-locals, too-many-branches, too-man
             - resource_base: Path to resource files
             - fifo_depth: Default FIFO depth
         fd: File descriptor to write to
+        exposure_flags: The ``collect_exposure_flags(sys)`` map, passed on to
+            ``gather_expr_validities``; ``None`` means the flags are recomputed
+        port_info: The ``analyze_and_register_ports(sys)`` result, when the caller
+            already computed it
     """
     # First, analyze the system to determine port requirements and collect DRAM modules
     # This registers all array write ports with the global port manager
-    port_manager, dram_modules = analyze_and_register_ports(sys)
+    if port_info is None:
+        port_info = analyze_and_register_ports(sys)
+    port_manager, dram_modules = port_info
+    all_modules = sys.modules + sys.downstreams
     external_specs = {
         spec.original_module_name: spec for spec in config.get('external_ffis', [])
     }
@@ -110,7 +118,7 @@ def dump_simulator( #pylint: disable=too-many-locals, too-many-branches, too-man
     downstream_reset = []
     registers = []
 
-    expr_validities, module_expr_map = gather_expr_validities(sys)
+    expr_validities, module_expr_map = gather_expr_validities(sys, exposure_flags)
 
     # Collect all ExternalIntrinsic instances
     external_intrinsics = collect_external_intrinsics(sys)
@@ -150,7 +158,7 @@ def dump_simulator( #pylint: disable=too-many-locals, too-many-branches, too-man
         registers.append(name)
 
     # Add module fields to simulator struct
-    for module in sys.modules[:] + sys.downstreams[:]:
+    for module in all_modules:
         module_name = namify(module.name)
 
         # Add triggered flag for all modules
@@ -178,22 +186,35 @@ def dump_simulator( #pylint: disable=too-many-locals, too-many-branches, too-man
                 field_type = f"{spec.crate_name}::{spec.struct_name}"
                 fd.write(f"pub {handle_field} : {field_type}, ")
                 simulator_init.append(f"{handle_field} : {field_type}::new(),")
-                if getattr(spec, "has_clock", False):
+                if spec.has_clock:
                     external_clock_handles.append(handle_field)
             else:
                 fd.write(f"pub {handle_field} : (), ")
                 simulator_init.append(f"{handle_field} : (),")
 
+    # Resolve each external class once: its FFI field type (None when no Verilator
+    # FFI was generated) and whether it has registered outputs that need a clock tick.
+    # Every instance of a class shares both answers.
+    external_class_handles = {}
+    for cls_name, ext_class in external_classes.items():
+        spec = external_specs.get(cls_name)
+        if spec is None:
+            external_class_handles[cls_name] = (None, False)
+            continue
+        # Check if this class has any registered outputs (kind='reg', direction='out')
+        has_reg_out = any(
+            wire.direction == 'out' and wire.kind == 'reg'
+            for wire in ext_class.port_specs().values()
+        )
+        external_class_handles[cls_name] = (f"{spec.crate_name}::{spec.struct_name}", has_reg_out)
+
     # Add fields for ExternalIntrinsic instances
     for intr in external_intrinsics:
         instance_uid = intr.uid
-        cls_name = intr.external_class.__name__
         field_name = f"external_{instance_uid}"
 
-        # Try to find the FFI spec for this external class
-        spec = external_specs.get(cls_name)
-        if spec is not None:
-            field_type = f"{spec.crate_name}::{spec.struct_name}"
+        field_type, _ = external_class_handles[intr.external_class.__name__]
+        if field_type is not None:
             fd.write(f"pub {field_name} : {field_type}, ")
             simulator_init.append(f"{field_name} : {field_type}::new(),")
         else:
@@ -264,18 +285,8 @@ def dump_simulator( #pylint: disable=too-many-locals, too-many-branches, too-man
         fd.write(f"    self.{handle}.clock_tick();\n")
     # Tick ExternalIntrinsic instances with registered outputs
     for intr in external_intrinsics:
-        cls_name = intr.external_class.__name__
-        # Only tick if we have a valid FFI spec
-        spec = external_specs.get(cls_name)
-        if spec is None:
-            continue
-
-        ext_class = external_classes[cls_name]
-        # Check if this class has any registered outputs (kind='reg', direction='out')
-        has_reg_out = any(
-            wire.direction == 'out' and wire.kind == 'reg'
-            for wire in ext_class.port_specs().values()
-        )
+        # Only tick if we have a valid FFI spec and a registered output
+        _, has_reg_out = external_class_handles[intr.external_class.__name__]
         if has_reg_out:
             instance_uid = intr.uid
             field_name = f"external_{instance_uid}"
@@ -297,7 +308,7 @@ def dump_simulator( #pylint: disable=too-many-locals, too-many-branches, too-man
 
     # Module simulation functions
     simulators = []
-    for module in sys.modules[:] + sys.downstreams[:]:
+    for module in all_modules:
         if is_stub_external(module):
             continue
         module_name = namify(module.name)
@@ -378,7 +389,6 @@ def dump_simulator( #pylint: disable=too-many-locals, too-many-branches, too-man
         module_name = downstream.name
         fd.write(f"Simulator::simulate_{module_name}, ")
     fd.write("];\n")
-    all_modules = sys.modules[:] + sys.downstreams[:]
     # Initialize memory from files if needed
     # TODO(@derui): Make SRAM a subclass of Downstream and make all SRAM payload
     #               initialization RegArray initialization.
@@ -1,6 +1,10 @@
 """Utility functions for simulator generation."""
 
-from ...ir.dtype import DType, Void, ArrayType, Record, Bits
+import functools
+import os
+from pathlib import Path
+
+from ...ir.dtype import DType, Void, ArrayType, Record
 from ...ir.module import Port
 from ...utils import namify
 
@@ -30,23 +34,10 @@ def dtype_to_rust_type(dtype: DType) -> str:
     """
 
     if isinstance(dtype, Record):
-        dtype = Bits(dtype.bits)
+        return _scalar_rust_type(False, dtype.bits)
 
     if dtype.is_int() or dtype.is_raw():
-        prefix = "u" if not dtype.is_signed() or dtype.is_raw() else "i"
-        bits = dtype.bits
-
-        if 8 <= bits <= 64:
-            # Round up to next power of 2
-            bits = 1 << (bits - 1).bit_length()
-            return f"{prefix}{bits}"
-        if bits == 1:
-            return "bool"
-        if bits < 8:
-            return f"{prefix}8"
-        if bits > 64:
-            return 'BigUint' if not dtype.is_signed() or dtype.is_raw() else 'BigInt'
-        raise ValueError(f"Unsupported data type: {dtype}")
+        return _scalar_rust_type(dtype.is_signed(), dtype.bits)
 
     if isinstance(dtype, Void):
         return "Box<EventKind>"
@@ -58,6 +49,29 @@ def dtype_to_rust_type(dtype: DType) -> str:
     raise ValueError(f"Unsupported data type: {dtype}")
 
 
+@functools.lru_cache(maxsize=None)
+def _scalar_rust_type(signed: bool, bits: int) -> str:
+    """Map a scalar signedness and width to its Rust type.
+
+    Keyed on plain values rather than on the dtype: ``DType.__eq__`` only compares
+    class and width, so e.g. two ``ArrayType`` values with different element types
+    would collide in a cache keyed on the dtype itself.
+    """
+    prefix = "i" if signed else "u"
+
+    if 8 <= bits <= 64:
+        # Round up to next power of 2
+        bits = 1 << (bits - 1).bit_length()
+        return f"{prefix}{bits}"
+    if bits == 1:
+        return "bool"
+    if bits < 8:
+        return f"{prefix}8"
+    if bits > 64:
+        return 'BigInt' if signed else 'BigUint'
+    raise ValueError(f"Unsupported data type: {prefix}{bits}")
+
+
 def int_imm_dumper_impl(ty: DType, value: int) -> str:
     """Generate Rust code for integer immediate values.
 
@@ -80,3 +94,21 @@ def fifo_name(fifo: Port):
     """
     module = fifo.module
     return f"{namify(module.name)}_{namify(fifo.name)}"
+
+
+def write_if_changed(path: Path, data: bytes) -> None:
+    """Write ``data`` to ``path`` atomically, leaving identical files untouched.
+
+    Unchanged files keep their mtime so cargo does not recompile them, and
+    changed files are swapped in with ``os.replace`` so no reader observes a
+    partially written file. The parent directory must already exist;
+    ``FileNotFoundError`` is raised otherwise.
+    """
+    try:
+        if path.stat().st_size == len(data) and path.read_bytes() == data:
+            return
+    except FileNotFoundError:
+        pass
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
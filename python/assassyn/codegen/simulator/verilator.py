@@ -1,31 +1,51 @@
 """Helpers for generating and wiring Verilator FFI crates for ExternalSV."""
+# pylint: disable=too-many-lines
 
 from __future__ import annotations
 
+import functools
+import hashlib
+import itertools
 import json
 import os
 import platform
 import shlex
 import shutil
+import string
 import subprocess
 import sys
-from dataclasses import dataclass, field
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional
+from typing import Dict, Iterable, List, Optional, Union
+
+try:
+    # Optional accelerator for the external module manifest.
+    import orjson
+except ImportError:
+    orjson = None
 
 from ...ir.dtype import DType
 from ...ir.module.external import ExternalSV
 from ...utils import namify, repo_path
-from .utils import camelize
+from .utils import camelize, write_if_changed
 
 
-_C_INT_TYPES_UNSIGNED = {8: "uint8_t", 16: "uint16_t", 32: "uint32_t", 64: "uint64_t"}
-_C_INT_TYPES_SIGNED = {8: "int8_t", 16: "int16_t", 32: "int32_t", 64: "int64_t"}
-_RUST_INT_TYPES_UNSIGNED = {8: "u8", 16: "u16", 32: "u32", 64: "u64"}
-_RUST_INT_TYPES_SIGNED = {8: "i8", 16: "i16", 32: "i32", 64: "i64"}
+# (signed, storage bits) -> (C type, Rust type)
+_SCALAR_TYPES = {
+    (False, 8): ("uint8_t", "u8"),
+    (False, 16): ("uint16_t", "u16"),
+    (False, 32): ("uint32_t", "u32"),
+    (False, 64): ("uint64_t", "u64"),
+    (True, 8): ("int8_t", "i8"),
+    (True, 16): ("int16_t", "i16"),
+    (True, 32): ("int32_t", "i32"),
+    (True, 64): ("int64_t", "i64"),
+}
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class FFIPort:
     """Description of a single ExternalSV port used for FFI generation."""
 
@@ -38,7 +58,7 @@ class FFIPort:
     rust_type: str
 
 
-@dataclass
+@dataclass(slots=True)
 class ExternalFFIModule:  # pylint: disable=too-many-instance-attributes
     """Artifacts emitted for a single ExternalSV module."""
 
@@ -53,6 +73,8 @@ class ExternalFFIModule:  # pylint: disable=too-many-instance-attributes
     outputs: List[FFIPort] = field(default_factory=list)
     has_clock: bool = False
     has_reset: bool = False
+    opt_level: str = "O2"
+    threads: int = 1
     original_module_name: str = ""
     struct_name: str = ""
     definitions: Dict[str, str] = field(default_factory=dict)
@@ -60,37 +82,39 @@ class ExternalFFIModule:  # pylint: disable=too-many-instance-attributes
     lib_path: Optional[Path] = None
 
 
+# Directory under the Verilator workspace holding the shared runtime objects.
+_RUNTIME_DIR_NAME = "_verilated_runtime"
+
+# Host integer width for every supported wire width, indexed by bit count (0..64).
+_STORAGE_WIDTH_LUT = tuple(
+    8 if bits <= 8 else 16 if bits <= 16 else 32 if bits <= 32 else 64 for bits in range(65)
+)
+
+
 def _storage_width(bits: int) -> int:
-    if bits <= 8:
-        return 8
-    if bits <= 16:
-        return 16
-    if bits <= 32:
-        return 32
-    if bits <= 64:
-        return 64
-    raise NotImplementedError(
-        f"ExternalSV wires wider than 64 bits are not yet supported (requested {bits} bits)"
-    )
+    if bits > 64:
+        raise NotImplementedError(
+            f"ExternalSV wires wider than 64 bits are not yet supported (requested {bits} bits)"
+        )
+    return _STORAGE_WIDTH_LUT[max(bits, 0)]
 
 
 def _dtype_to_port(name: str, wire_spec) -> FFIPort:
     """Convert a WireSpec to FFIPort for FFI generation."""
-    dtype = wire_spec.dtype
+    return _make_port(name, wire_spec.direction, wire_spec.dtype)
+
+
+@functools.lru_cache(maxsize=4096)
+def _make_port(name: str, direction: str, dtype: DType) -> FFIPort:
+    """Build the FFIPort for one wire signature; ports are frozen, so hits are shared."""
     bits = getattr(dtype, "bits", None)
     if bits is None:
         raise ValueError(f"Port '{name}' lacks a bit-width definition")
-    storage_bits = _storage_width(bits)
     signed = dtype.is_signed()
-    if signed:
-        c_type = _C_INT_TYPES_SIGNED[storage_bits]
-        rust_type = _RUST_INT_TYPES_SIGNED[storage_bits]
-    else:
-        c_type = _C_INT_TYPES_UNSIGNED[storage_bits]
-        rust_type = _RUST_INT_TYPES_UNSIGNED[storage_bits]
+    c_type, rust_type = _SCALAR_TYPES[signed, _storage_width(bits)]
     return FFIPort(
         name=namify(name),
-        direction=wire_spec.direction,
+        direction=direction,
         dtype=dtype,
         bits=bits,
         signed=signed,
@@ -106,9 +130,25 @@ def _ensure_repo_local_path(file_path: str) -> Path:
     return Path(repo_path()) / src
 
 
-def _write_file(path: Path, content: str) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(content, encoding="utf-8")
+def _encode(content: Union[str, bytes]) -> bytes:
+    return content if isinstance(content, bytes) else content.encode("utf-8")
+
+
+def _write_file(path: Path, content: Union[str, bytes], ensure_parent: bool = True) -> None:
+    if ensure_parent:
+        path.parent.mkdir(parents=True, exist_ok=True)
+    write_if_changed(path, _encode(content))
+
+
+def _write_files(
+    files: List[tuple[Path, Union[str, bytes]]], ensure_parents: bool = True
+) -> None:
+    """Write a batch of rendered files, creating each parent directory once."""
+    if ensure_parents:
+        for parent in {path.parent for path, _ in files}:
+            parent.mkdir(parents=True, exist_ok=True)
+    for path, content in files:
+        write_if_changed(path, _encode(content))
 
 
 def _dynamic_lib_suffix() -> str:
@@ -122,19 +162,28 @@ def _dynamic_lib_suffix() -> str:
 
 def _compiler_command() -> List[str]:
     """Detect and return the appropriate C++ compiler command."""
+    return list(
+        _detect_compiler_command(
+            os.environ.get("CXX"), os.environ.get("CC"), os.environ.get("PATH")
+        )
+    )
+
+
+@functools.lru_cache(maxsize=8)
+def _detect_compiler_command(
+    cxx: Optional[str], cc: Optional[str], search_path: Optional[str]
+) -> tuple[str, ...]:
+    """Resolve the compiler for one environment; every crate in a run shares the result."""
     # First, check if CXX environment variable is set
-    compiler_env = os.environ.get("CXX")
-    if compiler_env:
-        tokens = shlex.split(compiler_env)
+    if cxx:
+        tokens = shlex.split(cxx)
         if tokens:
-            return tokens
+            return tuple(tokens)
     # Try to detect the system's default C++ compiler more intelligently
     # Check for common compiler environment variables
-    for env_var in ["CXX", "CC"]:
-        if env_var in os.environ:
-            compiler_path = os.environ[env_var]
-            if compiler_path and shutil.which(compiler_path):
-                return [compiler_path]
+    for compiler_path in (cxx, cc):
+        if compiler_path and shutil.which(compiler_path, path=search_path):
+            return (compiler_path,)
     # Fallback to common C++ compilers, but try to be more system-appropriate
     candidates = []
     # On macOS, prefer clang++ if available (it's the default)
@@ -147,9 +196,9 @@ def _compiler_command() -> List[str]:
     else:
         candidates = ["c++", "g++", "clang++"]
     for candidate in candidates:
-        path = shutil.which(candidate)
+        path = shutil.which(candidate, path=search_path)
         if path:
-            return [path]
+            return (path,)
     raise RuntimeError(
         "Unable to locate a C++ compiler. Please set the CXX environment variable "
         "or install a C++ compiler (g++, clang++, or c++)."
@@ -172,11 +221,20 @@ def _prepare_build_directory(crate: ExternalFFIModule) -> Path:
     """Reset and create the Verilator build directory."""
     build_root = crate.crate_path / "build"
     obj_dir = build_root / "verilated"
-    shutil.rmtree(build_root, ignore_errors=True)
+    if build_root.is_dir():
+        shutil.rmtree(build_root, ignore_errors=True)
     obj_dir.mkdir(parents=True, exist_ok=True)
     return obj_dir
 
 
+def _verilator_opt_args(crate: ExternalFFIModule) -> List[str]:
+    """Return the Verilator optimisation flags; ``ASSASSYN_VERILATOR_OPT`` overrides the spec."""
+    args = [f"-{os.environ.get('ASSASSYN_VERILATOR_OPT', crate.opt_level)}"]
+    if crate.threads > 1:
+        args.extend(["--threads", str(crate.threads)])
+    return args
+
+
 def _run_verilator_compile(crate: ExternalFFIModule, sv_source: Path, obj_dir: Path) -> None:
     """Invoke Verilator to generate the C++ model."""
     verilator_exe = os.environ.get("ASSASSYN_VERILATOR", "verilator")
@@ -186,7 +244,7 @@ def _run_verilator_compile(crate: ExternalFFIModule, sv_source: Path, obj_dir: P
         str(sv_source),
         "--top-module",
         crate.top_module,
-        "-O3",
+        *_verilator_opt_args(crate),
         "--Mdir",
         str(obj_dir),
     ]
@@ -210,32 +268,28 @@ def _resolve_verilator_paths() -> tuple[Path, Path]:
 def _gather_source_files(
     crate: ExternalFFIModule,
     obj_dir: Path,
-    include_dir: Path,
+    runtime_objects: List[Path],
 ) -> List[Path]:
     """Collect all C++ sources required to build the shared library."""
     cpp_class = f"V{crate.top_module}"
     aggregated = obj_dir / f"{cpp_class}__ALL.cpp"
 
-    source_files: List[Path] = []
-    if aggregated.exists():
-        source_files.append(aggregated)
-    else:
-        for path in sorted(obj_dir.glob("*.cpp")):
-            if path.name.endswith("__ALL.cpp"):
-                continue
-            source_files.append(path)
+    if not aggregated.exists():
+        # `verilator --cc` leaves the amalgamation to its make flow; build it the
+        # same way verilated.mk does so the model compiles as one translation unit.
+        parts = sorted(
+            path.name for path in obj_dir.glob("*.cpp") if not path.name.endswith("__ALL.cpp")
+        )
+        _write_file(
+            aggregated, "".join(f'#include "{name}"\n' for name in parts), ensure_parent=False
+        )
+    source_files: List[Path] = [aggregated]
 
     wrapper_src = crate.crate_path / "src" / "wrapper.cpp"
     if not wrapper_src.exists():
         raise FileNotFoundError(f"Wrapper source not found: {wrapper_src}")
     source_files.append(wrapper_src)
-
-    runtime_sources = [include_dir / "verilated.cpp"]
-    for extra in ("verilated_threads.cpp", "verilated_dpi.cpp"):
-        extra_path = include_dir / extra
-        if extra_path.exists():
-            runtime_sources.append(extra_path)
-    source_files.extend(runtime_sources)
+    source_files.extend(runtime_objects)
     return source_files
 
 
@@ -254,21 +308,110 @@ def _build_compile_command(
         "-fPIC",
         "-O3",
     ]
+    if crate.threads > 1:
+        compile_cmd.append("-pthread")
     for include in (include_dir, vltstd_dir, obj_dir):
         compile_cmd.extend(["-I", str(include)])
     compile_cmd.extend(str(src) for src in source_files)
 
-    lib_filename = f"lib{crate.dynamic_lib_name}{_dynamic_lib_suffix()}"
-    lib_path = crate.crate_path / lib_filename
+    lib_filename, lib_path = _library_path(crate)
     compile_cmd.extend(["-o", str(lib_path)])
     return compile_cmd, lib_filename, lib_path
 
 
-def _unique_name(base: str, registry: Dict[str, int]) -> str:
+def _runtime_sources(include_dir: Path) -> List[Path]:
+    """Return the Verilator runtime sources every shared library links against."""
+    runtime_sources = [include_dir / "verilated.cpp"]
+    for extra in ("verilated_threads.cpp", "verilated_dpi.cpp"):
+        extra_path = include_dir / extra
+        if extra_path.exists():
+            runtime_sources.append(extra_path)
+    return runtime_sources
+
+
+def _build_verilator_runtime(
+    verilator_root: Path, specs: Iterable[ExternalFFIModule]
+) -> List[Path]:
+    """Compile the Verilator runtime once per workspace and return its object files.
+
+    The objects are linked into every crate in ``specs``, so they are compiled with
+    the union of the flags those crates need.
+    """
+    include_dir, vltstd_dir = _resolve_verilator_paths()
+    # Crate directories are all named verilated_*, so this name never collides.
+    runtime_dir = verilator_root / _RUNTIME_DIR_NAME
+    runtime_dir.mkdir(parents=True, exist_ok=True)
+    sources = _runtime_sources(include_dir)
+    objects = [runtime_dir / f"{source.stem}.o" for source in sources]
+    compile_cmd = _compiler_command() + [
+        "-std=c++17",
+        "-fPIC",
+        "-O3",
+        "-I",
+        str(include_dir),
+        "-I",
+        str(vltstd_dir),
+        "-c",
+    ]
+    if any(spec.threads > 1 for spec in specs):
+        compile_cmd.append("-pthread")
+    verilated_h = include_dir / "verilated.h"
+    key = hashlib.sha256(
+        json.dumps(
+            [
+                compile_cmd,
+                [str(source) for source in sources],
+                verilated_h.stat().st_mtime_ns if verilated_h.exists() else None,
+            ]
+        ).encode("utf-8")
+    ).hexdigest()
+    key_path = runtime_dir / ".runtime-key"
+    if (
+        all(obj.exists() for obj in objects)
+        and key_path.exists()
+        and key_path.read_text() == key
+    ):
+        return objects
+    for source, obj in zip(sources, objects):
+        _run_subprocess(compile_cmd + [str(source), "-o", str(obj)])
+    _write_file(key_path, key, ensure_parent=False)
+    return objects
+
+
+def _library_path(crate: ExternalFFIModule) -> tuple[str, Path]:
+    """Return the shared library file name and its path inside the crate."""
+    lib_filename = f"lib{crate.dynamic_lib_name}{_dynamic_lib_suffix()}"
+    return lib_filename, crate.crate_path / lib_filename
+
+
+def _build_key(crate: ExternalFFIModule, sv_source: Path, include_dir: Path) -> str:
+    """Fingerprint every input of the native build of ``crate``."""
+    verilated_h = include_dir / "verilated.h"
+    inputs = [
+        hashlib.sha256(sv_source.read_bytes()).hexdigest(),
+        hashlib.sha256((crate.crate_path / "src" / "wrapper.cpp").read_bytes()).hexdigest(),
+        crate.top_module,
+        crate.dynamic_lib_name,
+        os.environ.get("ASSASSYN_VERILATOR", "verilator"),
+        _verilator_opt_args(crate),
+        str(include_dir),
+        verilated_h.stat().st_mtime_ns if verilated_h.exists() else None,
+        _compiler_command(),
+    ]
+    return hashlib.sha256(json.dumps(inputs).encode("utf-8")).hexdigest()
+
+
+def _unique_name(base: str, registry: Counter[str]) -> str:
     """Return a unique name derived from base and update the registry."""
-    count = registry.get(base, 0)
-    registry[base] = count + 1
-    return base if count == 0 else f"{base}_{count + 1}"
+    registry[base] += 1
+    count = registry[base]
+    return base if count == 1 else f"{base}_{count}"
+
+
+def _struct_name(symbol_prefix: str) -> str:
+    """Return the Rust wrapper struct name for a crate's symbol prefix."""
+    struct_name = camelize(symbol_prefix) or "ExternalModule"
+    return struct_name[0].upper() + struct_name[1:]
 
 
 def _sanitize_base_name(top_module: str, fallback: str) -> str:
@@ -281,38 +424,33 @@ def _sanitize_base_name(top_module: str, fallback: str) -> str:
     return base
 
 
+def _partition_ports(
+    wires: Dict[str, object], output_direction: str
+) -> tuple[List[FFIPort], List[FFIPort]]:
+    """Convert wires to FFIPorts and split them into (inputs, outputs)."""
+    ports = [_dtype_to_port(name, wire) for name, wire in wires.items()]
+    return (
+        [port for port in ports if port.direction != output_direction],
+        [port for port in ports if port.direction == output_direction],
+    )
+
+
 def _collect_ports(module: ExternalSV) -> tuple[List[FFIPort], List[FFIPort]]:
     """Split module wires into input and output ports for FFI generation."""
-    ports_in: List[FFIPort] = []
-    ports_out: List[FFIPort] = []
-    for name, wire in module.wires.items():
-        port = _dtype_to_port(name, wire)
-        if port.direction == "output":
-            ports_out.append(port)
-        else:
-            ports_in.append(port)
-    return ports_in, ports_out
+    return _partition_ports(module.wires, "output")
 
 
 def _collect_ports_from_class(external_class: type) -> tuple[List[FFIPort], List[FFIPort]]:
     """Split class port specs into input and output ports for FFI generation."""
-    ports_in: List[FFIPort] = []
-    ports_out: List[FFIPort] = []
-    for name, wire_spec in external_class.port_specs().items():
-        port = _dtype_to_port(name, wire_spec)
-        # WireSpec uses 'in'/'out', not 'input'/'output'
-        if port.direction == "out":
-            ports_out.append(port)
-        else:
-            ports_in.append(port)
-    return ports_in, ports_out
+    # WireSpec uses 'in'/'out', not 'input'/'output'
+    return _partition_ports(external_class.port_specs(), "out")
 
 
 def _create_external_spec(
     module: ExternalSV,
     verilator_root: Path,
-    used_crate_names: Dict[str, int],
-    used_dynlib_names: Dict[str, int],
+    used_crate_names: Counter[str],
+    used_dynlib_names: Counter[str],
 ) -> ExternalFFIModule:
     """Create an ExternalFFIModule description and prepare the crate directory."""
     top_module = module.external_module_name
@@ -320,21 +458,20 @@ def _create_external_spec(
         raise ValueError("ExternalSV module must specify 'module_name' to drive Verilator")
 
     base_name = _sanitize_base_name(top_module, module.name)
+    # base_name is already an identifier, so the derived names need no namify pass.
     crate_name = _unique_name(f"verilated_{base_name}", used_crate_names)
-    symbol_prefix = namify(crate_name)
-    dynlib_base = f"{symbol_prefix}_ffi"
-    dynamic_lib_name = namify(_unique_name(dynlib_base, used_dynlib_names))
+    symbol_prefix = crate_name
+    dynamic_lib_name = _unique_name(f"{symbol_prefix}_ffi", used_dynlib_names)
 
     crate_path = verilator_root / crate_name
-    crate_path.mkdir(parents=True, exist_ok=True)
-    (crate_path / "src").mkdir(exist_ok=True)
+    (crate_path / "src").mkdir(parents=True, exist_ok=True)
     (crate_path / "rtl").mkdir(exist_ok=True)
 
     src_sv_path = _ensure_repo_local_path(module.file_path)
     if not src_sv_path.exists():
         raise FileNotFoundError(f"ExternalSV file not found: {src_sv_path}")
     dst_sv_path = crate_path / "rtl" / src_sv_path.name
-    shutil.copy(src_sv_path, dst_sv_path)
+    shutil.copyfile(src_sv_path, dst_sv_path)
 
     ports_in, ports_out = _collect_ports(module)
 
@@ -345,20 +482,22 @@ def _create_external_spec(
         dynamic_lib_name=dynamic_lib_name,
         top_module=top_module,
         sv_filename=src_sv_path.name,
-        sv_rel_path=os.path.join("rtl", src_sv_path.name),
+        sv_rel_path=f"rtl/{src_sv_path.name}",
         inputs=ports_in,
         outputs=ports_out,
         has_clock=getattr(module, "has_clock", False),
         has_reset=getattr(module, "has_reset", False),
+        threads=getattr(module, "threads", 1),
         original_module_name=module.name,
+        struct_name=_struct_name(symbol_prefix),
     )
 
 
 def _create_external_spec_from_class(
     external_class: type,
     verilator_root: Path,
-    used_crate_names: Dict[str, int],
-    used_dynlib_names: Dict[str, int],
+    used_crate_names: Counter[str],
+    used_dynlib_names: Counter[str],
 ) -> ExternalFFIModule:
     """Create an ExternalFFIModule description from an ExternalSV class."""
     metadata = external_class.metadata()
@@ -382,20 +521,17 @@ def _create_external_spec_from_class(
         f"verilated_{_sanitize_base_name(top_module, external_class.__name__)}",
         used_crate_names,
     )
-    symbol_prefix = namify(crate_name)
-    dynamic_lib_name = namify(
-        _unique_name(f"{symbol_prefix}_ffi", used_dynlib_names)
-    )
+    symbol_prefix = crate_name
+    dynamic_lib_name = _unique_name(f"{symbol_prefix}_ffi", used_dynlib_names)
 
     crate_path = verilator_root / crate_name
-    crate_path.mkdir(parents=True, exist_ok=True)
-    (crate_path / "src").mkdir(exist_ok=True)
+    (crate_path / "src").mkdir(parents=True, exist_ok=True)
     (crate_path / "rtl").mkdir(exist_ok=True)
 
     src_sv_path = _ensure_repo_local_path(file_path)
     if not src_sv_path.exists():
         raise FileNotFoundError(f"ExternalSV file not found: {src_sv_path}")
-    shutil.copy(src_sv_path, crate_path / "rtl" / src_sv_path.name)
+    shutil.copyfile(src_sv_path, crate_path / "rtl" / src_sv_path.name)
 
     ports_in, ports_out = _collect_ports_from_class(external_class)
 
@@ -406,12 +542,14 @@ def _create_external_spec_from_class(
         dynamic_lib_name=dynamic_lib_name,
         top_module=top_module,
         sv_filename=src_sv_path.name,
-        sv_rel_path=os.path.join("rtl", src_sv_path.name),
+        sv_rel_path=f"rtl/{src_sv_path.name}",
         inputs=ports_in,
         outputs=ports_out,
         has_clock=metadata.get("has_clock", False),
         has_reset=metadata.get("has_reset", False),
+        threads=metadata.get("threads", 1),
         original_module_name=external_class.__name__,
+        struct_name=_struct_name(symbol_prefix),
     )
 
 
@@ -452,357 +590,407 @@ def _spec_manifest_entry(spec: ExternalFFIModule, simulator_root: Path) -> Dict[
     }
 
 
-def _generate_cargo_toml(crate: ExternalFFIModule) -> str:
-    runtime_dir = Path(repo_path()) / "tools" / "rust-sim-runtime"
-    runtime_rel = os.path.relpath(runtime_dir, crate.crate_path)
-    runtime_rel = runtime_rel.replace(os.sep, "/")
-    return f"""[package]
-name = "{crate.crate_name}"
+_CARGO_TOML_TEMPLATE = string.Template("""[package]
+name = "$crate_name"
 version = "0.1.0"
 edition = "2021"
 [dependencies]
-sim-runtime = {{ path = "{runtime_rel}" }}
+sim-runtime = { path = "$runtime_rel" }
+""")
+
+
+def _generate_cargo_toml(crate: ExternalFFIModule) -> str:
+    runtime_dir = Path(repo_path()) / "tools" / "rust-sim-runtime"
+    runtime_rel = os.path.relpath(runtime_dir, crate.crate_path)
+    return _CARGO_TOML_TEMPLATE.substitute(
+        crate_name=crate.crate_name,
+        runtime_rel=runtime_rel.replace(os.sep, "/"),
+    )
+
+
+_LIB_RS_TEMPLATE = """\
+#![allow(dead_code)]
+use sim_runtime::libloading::Library;
+use std::path::{{Path, PathBuf}};
+use std::ptr::NonNull;
+
+#[repr(C)]
+#[allow(non_camel_case_types)]
+pub struct ModuleHandle {{ _private: [u8; 0] }}
+
+const LIB_PATH: &str = include_str!(concat!(env!("CARGO_MANIFEST_DIR"), \
+"/.verilator-lib-path"));
+
+fn lib_path() -> PathBuf {{
+    PathBuf::from(LIB_PATH.trim())
+}}
+
+fn load_library<P: AsRef<Path>>(path: P) -> Library {{
+    let path = path.as_ref();
+    unsafe {{ Library::new(path) }}.unwrap_or_else(|err| panic!("failed to load Verilator \
+library '{prefix}': {{err}} ({{}})", path.display()))
+}}
+
+unsafe fn load_symbol<T: Copy>(lib: &Library, symbol: &[u8], name: &str) -> T {{
+    *lib.get::<T>(symbol).unwrap_or_else(|err| panic!("failed to load symbol {{name}}: {{err}}"))
+}}
+
+pub struct {struct_name} {{
+    lib: Library,
+    handle: NonNull<ModuleHandle>,
+    free_fn: unsafe extern "C" fn(*mut ModuleHandle),
+    eval_fn: unsafe extern "C" fn(*mut ModuleHandle),
+{fields}}}
+
+impl {struct_name} {{
+    pub fn new() -> Self {{
+        let path = lib_path();
+        Self::new_from_path(path)
+    }}
+
+    pub fn new_from_path<P: AsRef<Path>>(path: P) -> Self {{
+        let lib = load_library(path);
+        unsafe {{
+            let new_fn: unsafe extern "C" fn() -> *mut ModuleHandle = \
+load_symbol(&lib, b"{prefix}_new", "{prefix}_new");
+            let free_fn: unsafe extern "C" fn(*mut ModuleHandle) = \
+load_symbol(&lib, b"{prefix}_free", "{prefix}_free");
+            let eval_fn: unsafe extern "C" fn(*mut ModuleHandle) = \
+load_symbol(&lib, b"{prefix}_eval", "{prefix}_eval");
+{loads}\
+            let handle = NonNull::new(new_fn()).unwrap_or_else(|| \
+panic!("{prefix}_new returned null"));
+            let mut instance = Self {{
+                lib,
+                handle,
+                free_fn,
+                eval_fn,
+{inits}\
+            }};
+{resets}\
+            instance
+        }}
+    }}
+
+    pub fn eval(&mut self) {{ unsafe {{ (self.eval_fn)(self.handle.as_ptr()) }} }}
+
+{methods}}}
+
+impl Drop for {struct_name} {{
+    fn drop(&mut self) {{ unsafe {{ (self.free_fn)(self.handle.as_ptr()) }} }}
+}}"""
+
+_LIB_RS_CLOCK_METHODS = """\
+    pub fn set_clock(&mut self, value: bool) {
+        let value = value as u8;
+        unsafe { (self.set_clk_fn)(self.handle.as_ptr(), value) };
+        self.clk_state = value;
+    }
+
+    pub fn clock_tick(&mut self) {
+        self.set_clock(false);
+        self.eval();
+        self.set_clock(true);
+        self.eval();
+    }
+
 """
 
+_LIB_RS_RESET_METHODS = """\
+    pub fn set_reset(&mut self, value: bool) {
+        let value = value as u8;
+        unsafe { (self.set_rst_fn)(self.handle.as_ptr(), value) };
+        self.rst_state = value;
+    }
 
-def _generate_lib_rs(crate: ExternalFFIModule) -> str:  # pylint: disable=too-many-branches
-    # pylint: disable=too-many-locals, too-many-statements
-    struct_name = camelize(crate.symbol_prefix) or "ExternalModule"
-    struct_name = struct_name[0].upper() + struct_name[1:]
-    crate.struct_name = struct_name
-    prefix = crate.symbol_prefix
+"""
 
-    lines = [
-        "#![allow(dead_code)]",
-        "use sim_runtime::libloading::Library;",
-        "use std::path::{Path, PathBuf};",
-        "use std::ptr::NonNull;",
-        "",
-        "#[repr(C)]",
-        "#[allow(non_camel_case_types)]",
-        "pub struct ModuleHandle { _private: [u8; 0] }",
-        "",
-        (
-            "const LIB_PATH: &str = include_str!(concat!("
-            "env!(\"CARGO_MANIFEST_DIR\"), \"/.verilator-lib-path\"));"
-        ),
-        "",
-        "fn lib_path() -> PathBuf {",
-        "    PathBuf::from(LIB_PATH.trim())",
-        "}",
-        "",
-        "fn load_library<P: AsRef<Path>>(path: P) -> Library {",
-        "    let path = path.as_ref();",
-        (
-            "    unsafe { Library::new(path) }."
-            "unwrap_or_else(|err| panic!(\"failed to load Verilator library '"
-            f"{prefix}': {{err}} ({{}})\", path.display()))"
-        ),
-        "}",
-        "",
-        "unsafe fn load_symbol<T: Copy>(lib: &Library, symbol: &[u8], name: &str) -> T {",
-        (
-            "    *lib.get::<T>(symbol).unwrap_or_else(|err| "
-            "panic!(\"failed to load symbol {name}: {err}\"))"
-        ),
-        "}",
-        "",
-        f"pub struct {struct_name} {{",
-        "    lib: Library,",
-        "    handle: NonNull<ModuleHandle>,",
-        "    free_fn: unsafe extern \"C\" fn(*mut ModuleHandle),",
-        "    eval_fn: unsafe extern \"C\" fn(*mut ModuleHandle),",
-    ]
+# apply_reset pulses the clock when the module has one, otherwise it only evaluates.
+_LIB_RS_CLOCKED_APPLY_RESET = """\
+    pub fn apply_reset(&mut self, cycles: usize) {
+        self.set_reset(true);
+        for _ in 0..cycles.max(1) {
+            self.clock_tick();
+        }
+        self.set_reset(false);
+        self.clock_tick();
+    }
 
-    if crate.has_clock:
-        lines.append("    set_clk_fn: unsafe extern \"C\" fn(*mut ModuleHandle, u8),")
-        lines.append("    clk_state: u8,")
-    if crate.has_reset:
-        lines.append("    set_rst_fn: unsafe extern \"C\" fn(*mut ModuleHandle, u8),")
-        lines.append("    rst_state: u8,")
-    for port in crate.inputs:
-        lines.append(
-            (
-                f"    set_{port.name}_fn: unsafe extern \"C\" fn(*mut ModuleHandle, "
-                f"{port.rust_type}),"
-            )
-        )
-    for port in crate.outputs:
-        lines.append(
-            (
-                f"    get_{port.name}_fn: unsafe extern \"C\" fn(*mut ModuleHandle) -> "
-                f"{port.rust_type},"
-            )
-        )
-    lines.append("}")
-    lines.append("")
-
-    impl_lines = [
-        f"impl {struct_name} {{",
-        "    pub fn new() -> Self {",
-        "        let path = lib_path();",
-        "        Self::new_from_path(path)",
-        "    }",
-        "",
-        "    pub fn new_from_path<P: AsRef<Path>>(path: P) -> Self {",
-        "        let lib = load_library(path);",
-        "        unsafe {",
-        (
-            "            let new_fn: unsafe extern \"C\" fn() -> *mut ModuleHandle = "
-            f"load_symbol(&lib, b\"{prefix}_new\", \"{prefix}_new\");"
-        ),
-        (
-            "            let free_fn: unsafe extern \"C\" fn(*mut ModuleHandle) = "
-            f"load_symbol(&lib, b\"{prefix}_free\", \"{prefix}_free\");"
-        ),
-        (
-            "            let eval_fn: unsafe extern \"C\" fn(*mut ModuleHandle) = "
-            f"load_symbol(&lib, b\"{prefix}_eval\", \"{prefix}_eval\");"
-        ),
-    ]
+"""
 
-    if crate.has_clock:
-        impl_lines.append(
-            (
-                "            let set_clk_fn: unsafe extern \"C\" fn(*mut ModuleHandle, u8) = "
-                f"load_symbol(&lib, b\"{prefix}_set_clk\", \"{prefix}_set_clk\");"
-            )
+_LIB_RS_UNCLOCKED_APPLY_RESET = """\
+    pub fn apply_reset(&mut self, cycles: usize) {
+        let _ = cycles;
+        self.set_reset(true);
+        self.eval();
+        self.set_reset(false);
+        self.eval();
+    }
+
+"""
+
+
+def _generate_lib_rs(crate: ExternalFFIModule) -> str:
+    prefix = crate.symbol_prefix
+    has_clock = crate.has_clock
+    has_reset = crate.has_reset
+
+    fields = []
+    loads = []
+    inits = []
+    resets = []
+    methods = []
+    if has_clock:
+        fields.append(
+            '    set_clk_fn: unsafe extern "C" fn(*mut ModuleHandle, u8),\n'
+            "    clk_state: u8,\n"
         )
-    if crate.has_reset:
-        impl_lines.append(
-            (
-                "            let set_rst_fn: unsafe extern \"C\" fn(*mut ModuleHandle, u8) = "
-                f"load_symbol(&lib, b\"{prefix}_set_rst\", \"{prefix}_set_rst\");"
-            )
+        loads.append(
+            '            let set_clk_fn: unsafe extern "C" fn(*mut ModuleHandle, u8) = '
+            f'load_symbol(&lib, b"{prefix}_set_clk", "{prefix}_set_clk");\n'
         )
-    for port in crate.inputs:
-        impl_lines.append(
-            (
-                f"            let set_{port.name}_fn: unsafe extern \"C\" fn(*mut ModuleHandle, "
-                f"{port.rust_type}) = load_symbol(&lib, b\"{prefix}_set_{port.name}\", "
-                f"\"{prefix}_set_{port.name}\");"
-            )
+        inits.append("                set_clk_fn,\n                clk_state: 0,\n")
+        resets.append("            set_clk_fn(instance.handle.as_ptr(), 0);\n")
+        methods.append(_LIB_RS_CLOCK_METHODS)
+    if has_reset:
+        fields.append(
+            '    set_rst_fn: unsafe extern "C" fn(*mut ModuleHandle, u8),\n'
+            "    rst_state: u8,\n"
         )
-    for port in crate.outputs:
-        impl_lines.append(
-            (
-                f"            let get_{port.name}_fn: unsafe extern \"C\" fn(*mut ModuleHandle) -> "
-                f"{port.rust_type} = load_symbol(&lib, b\"{prefix}_get_{port.name}\", "
-                f"\"{prefix}_get_{port.name}\");"
-            )
+        loads.append(
+            '            let set_rst_fn: unsafe extern "C" fn(*mut ModuleHandle, u8) = '
+            f'load_symbol(&lib, b"{prefix}_set_rst", "{prefix}_set_rst");\n'
         )
-    impl_lines.append(
-        (
-            "            let handle = NonNull::new(new_fn())."
-            f"unwrap_or_else(|| panic!(\"{prefix}_new returned null\"));"
+        inits.append("                set_rst_fn,\n                rst_state: 0,\n")
+        resets.append("            set_rst_fn(instance.handle.as_ptr(), 0);\n")
+        methods.append(_LIB_RS_RESET_METHODS)
+        methods.append(
+            _LIB_RS_CLOCKED_APPLY_RESET if has_clock else _LIB_RS_UNCLOCKED_APPLY_RESET
         )
-    )
-    impl_lines.append("            let mut instance = Self {")
-    impl_lines.append("                lib,")
-    impl_lines.append("                handle,")
-    impl_lines.append("                free_fn,")
-    impl_lines.append("                eval_fn,")
-    if crate.has_clock:
-        impl_lines.append("                set_clk_fn,")
-        impl_lines.append("                clk_state: 0,")
-    if crate.has_reset:
-        impl_lines.append("                set_rst_fn,")
-        impl_lines.append("                rst_state: 0,")
+    # Each port's function-pointer type and symbol name feed several sections, so
+    # they are rendered once per port.
     for port in crate.inputs:
-        impl_lines.append(f"                set_{port.name}_fn,")
-    for port in crate.outputs:
-        impl_lines.append(f"                get_{port.name}_fn,")
-    impl_lines.append("            };")
-    if crate.has_clock:
-        impl_lines.append("            set_clk_fn(instance.handle.as_ptr(), 0);")
-    if crate.has_reset:
-        impl_lines.append("            set_rst_fn(instance.handle.as_ptr(), 0);")
-    impl_lines.append("            instance")
-    impl_lines.append("        }")
-    impl_lines.append("    }")
-    impl_lines.append("")
-    impl_lines.append(
-        "    pub fn eval(&mut self) { unsafe { (self.eval_fn)(self.handle.as_ptr()) } }"
-    )
-    impl_lines.append("")
-
-    if crate.has_clock:
-        impl_lines.extend(
-            [
-                "    pub fn set_clock(&mut self, value: bool) {",
-                "        let value = value as u8;",
-                "        unsafe { (self.set_clk_fn)(self.handle.as_ptr(), value) };",
-                "        self.clk_state = value;",
-                "    }",
-                "",
-                "    pub fn clock_tick(&mut self) {",
-                "        self.set_clock(false);",
-                "        self.eval();",
-                "        self.set_clock(true);",
-                "        self.eval();",
-                "    }",
-                "",
-            ]
+        name, rust_type = port.name, port.rust_type
+        fn_type = f'unsafe extern "C" fn(*mut ModuleHandle, {rust_type})'
+        symbol = f"{prefix}_set_{name}"
+        fields.append(f"    set_{name}_fn: {fn_type},\n")
+        loads.append(
+            f"            let set_{name}_fn: {fn_type} = "
+            f'load_symbol(&lib, b"{symbol}", "{symbol}");\n'
         )
-    if crate.has_reset:
-        impl_lines.extend(
-            [
-                "    pub fn set_reset(&mut self, value: bool) {",
-                "        let value = value as u8;",
-                "        unsafe { (self.set_rst_fn)(self.handle.as_ptr(), value) };",
-                "        self.rst_state = value;",
-                "    }",
-                "",
-            ]
-        )
-        if crate.has_clock:
-            impl_lines.extend(
-                [
-                    "    pub fn apply_reset(&mut self, cycles: usize) {",
-                    "        self.set_reset(true);",
-                    "        for _ in 0..cycles.max(1) {",
-                    "            self.clock_tick();",
-                    "        }",
-                    "        self.set_reset(false);",
-                    "        self.clock_tick();",
-                    "    }",
-                    "",
-                ]
-            )
-        else:
-            impl_lines.extend(
-                [
-                    "    pub fn apply_reset(&mut self, cycles: usize) {",
-                    "        let _ = cycles;",
-                    "        self.set_reset(true);",
-                    "        self.eval();",
-                    "        self.set_reset(false);",
-                    "        self.eval();",
-                    "    }",
-                    "",
-                ]
-            )
-
-    for port in crate.inputs:
-        impl_lines.extend(
-            [
-                f"    pub fn set_{port.name}(&mut self, value: {port.rust_type}) {{",
-                f"        unsafe {{ (self.set_{port.name}_fn)(self.handle.as_ptr(), value) }};",
-                "    }",
-                "",
-            ]
+        inits.append(f"                set_{name}_fn,\n")
+        methods.append(
+            f"    pub fn set_{name}(&mut self, value: {rust_type}) {{\n"
+            f"        unsafe {{ (self.set_{name}_fn)(self.handle.as_ptr(), value) }};\n"
+            "    }\n\n"
         )
     for port in crate.outputs:
-        impl_lines.extend(
-            [
-                f"    pub fn get_{port.name}(&mut self) -> {port.rust_type} {{",
-                f"        unsafe {{ (self.get_{port.name}_fn)(self.handle.as_ptr()) }}",
-                "    }",
-                "",
-            ]
+        name, rust_type = port.name, port.rust_type
+        fn_type = f'unsafe extern "C" fn(*mut ModuleHandle) -> {rust_type}'
+        symbol = f"{prefix}_get_{name}"
+        fields.append(f"    get_{name}_fn: {fn_type},\n")
+        loads.append(
+            f"            let get_{name}_fn: {fn_type} = "
+            f'load_symbol(&lib, b"{symbol}", "{symbol}");\n'
+        )
+        inits.append(f"                get_{name}_fn,\n")
+        methods.append(
+            f"    pub fn get_{name}(&mut self) -> {rust_type} {{\n"
+            f"        unsafe {{ (self.get_{name}_fn)(self.handle.as_ptr()) }}\n"
+            "    }\n\n"
         )
-    impl_lines.append("}")
-    lines.extend(impl_lines)
-    lines.append("")
-    lines.append(f"impl Drop for {struct_name} {{")
-    lines.append(
-        "    fn drop(&mut self) { unsafe { (self.free_fn)(self.handle.as_ptr()) } }"
+
+    return _LIB_RS_TEMPLATE.format(
+        prefix=prefix,
+        struct_name=crate.struct_name,
+        fields="".join(fields),
+        loads="".join(loads),
+        inits="".join(inits),
+        resets="".join(resets),
+        methods="".join(methods),
     )
-    lines.append("}")
 
-    return "\n".join(lines)
+
+_WRAPPER_CPP_TEMPLATE = """\
+#include "{cpp_class}.h"
+#include "verilated.h"
+#include <cstdint>
+
+double sc_time_stamp() {{ return 0.0; }}
+
+extern "C" {{
+
+using ModuleHandle = {cpp_class};
+
+ModuleHandle* {prefix}_new() {{
+    static bool inited = false;
+    if (!inited) {{ Verilated::debug(0); inited = true; }}
+    return new ModuleHandle();
+}}
+
+void {prefix}_free(ModuleHandle* handle) {{ delete handle; }}
+
+void {prefix}_eval(ModuleHandle* handle) {{ handle->eval(); }}
+{accessors}}}
+"""
+
+
+_WRAPPER_CPP_BIT_SETTER = """\
+void {prefix}_set_{name}(ModuleHandle* handle, uint8_t value) {{
+    handle->{name} = static_cast<uint8_t>(value & 0x1U);
+}}
+"""
+
+_WRAPPER_CPP_SETTER = """\
+void {prefix}_set_{name}(ModuleHandle* handle, {c_type} value) {{
+    handle->{name} = static_cast<{c_type}>(value);
+}}
+"""
+
+_WRAPPER_CPP_GETTER = """\
+{c_type} {prefix}_get_{name}(ModuleHandle* handle) {{
+    return static_cast<{c_type}>(handle->{name});
+}}
+"""
 
 
 def _generate_wrapper_cpp(crate: ExternalFFIModule) -> str:
-    cpp_class = f"V{crate.top_module}"
     prefix = crate.symbol_prefix
-    lines = [
-        f"#include \"{cpp_class}.h\"",
-        "#include \"verilated.h\"",
-        "#include <cstdint>",
-        "",
-        "double sc_time_stamp() { return 0.0; }",
-        "",
-        "extern \"C\" {",
-        "",
-        f"using ModuleHandle = {cpp_class};",
-        "",
-        f"ModuleHandle* {prefix}_new() {{",
-        "    static bool inited = false;",
-        "    if (!inited) { Verilated::debug(0); inited = true; }",
-        "    return new ModuleHandle();",
-        "}",
-        "",
-        f"void {prefix}_free(ModuleHandle* handle) {{ delete handle; }}",
-        "",
-        f"void {prefix}_eval(ModuleHandle* handle) {{ handle->eval(); }}",
-    ]
-    if crate.has_clock:
-        lines.extend(
-            [
-                f"void {prefix}_set_clk(ModuleHandle* handle, uint8_t value) {{",
-                "    handle->clk = static_cast<uint8_t>(value & 0x1U);",
-                "}",
-            ]
-        )
-    if crate.has_reset:
-        lines.extend(
-            [
-                f"void {prefix}_set_rst(ModuleHandle* handle, uint8_t value) {{",
-                "    handle->rst = static_cast<uint8_t>(value & 0x1U);",
-                "}",
-            ]
-        )
-    for port in crate.inputs:
-        lines.extend(
-            [
-                f"void {prefix}_set_{port.name}(ModuleHandle* handle, {port.c_type} value) {{",
-                f"    handle->{port.name} = static_cast<{port.c_type}>(value);",
-                "}",
-            ]
-        )
-    for port in crate.outputs:
-        lines.extend(
-            [
-                f"{port.c_type} {prefix}_get_{port.name}(ModuleHandle* handle) {{",
-                f"    return static_cast<{port.c_type}>(handle->{port.name});",
-                "}",
-            ]
-        )
-    lines.append("}")
-    return "\n".join(lines) + "\n"
+    control = [name for name, on in (("clk", crate.has_clock), ("rst", crate.has_reset)) if on]
+    accessors = "".join(itertools.chain(
+        (_WRAPPER_CPP_BIT_SETTER.format(prefix=prefix, name=name) for name in control),
+        (_WRAPPER_CPP_SETTER.format(prefix=prefix, name=port.name, c_type=port.c_type)
+         for port in crate.inputs),
+        (_WRAPPER_CPP_GETTER.format(prefix=prefix, name=port.name, c_type=port.c_type)
+         for port in crate.outputs),
+    ))
+    return _WRAPPER_CPP_TEMPLATE.format(
+        cpp_class=f"V{crate.top_module}",
+        prefix=prefix,
+        accessors=accessors,
+    )
 
 
-def _build_verilator_library(crate: ExternalFFIModule) -> Path:
+def _build_verilator_library(crate: ExternalFFIModule, runtime_objects: List[Path]) -> Path:
     """Compile the Verilator-generated model and wrapper into a shared library."""
 
     sv_source = _ensure_sv_source(crate)
-    obj_dir = _prepare_build_directory(crate)
-    _run_verilator_compile(crate, sv_source, obj_dir)
     include_dir, vltstd_dir = _resolve_verilator_paths()
-    source_files = _gather_source_files(crate, obj_dir, include_dir)
-    compile_cmd, lib_filename, lib_path = _build_compile_command(
-        crate,
-        source_files,
-        include_dir,
-        vltstd_dir,
-        obj_dir,
-    )
-    _run_subprocess(compile_cmd)
+    lib_filename, lib_path = _library_path(crate)
+    build_key = _build_key(crate, sv_source, include_dir)
+    key_path = crate.crate_path / ".verilator-build-key"
+    cached = lib_path.exists() and key_path.exists() and key_path.read_text() == build_key
+    if not cached:
+        obj_dir = _prepare_build_directory(crate)
+        _run_verilator_compile(crate, sv_source, obj_dir)
+        source_files = _gather_source_files(crate, obj_dir, runtime_objects)
+        compile_cmd, _, _ = _build_compile_command(
+            crate,
+            source_files,
+            include_dir,
+            vltstd_dir,
+            obj_dir,
+        )
+        _run_subprocess(compile_cmd)
+        _write_file(key_path, build_key, ensure_parent=False)
 
     crate.lib_filename = lib_filename
     crate.lib_path = lib_path
 
-    _write_file(crate.crate_path / ".verilator-lib-path", str(lib_path.resolve()))
+    _write_file(
+        crate.crate_path / ".verilator-lib-path",
+        os.fsencode(lib_path.resolve()),
+        ensure_parent=False,
+    )
     return lib_path
 
 
-def _emit_crate_artifacts(spec: ExternalFFIModule) -> None:
+def _emit_crate_artifacts(spec: ExternalFFIModule, runtime_objects: List[Path]) -> None:
     """Generate crate sources and build the shared library for a spec."""
-    _write_file(spec.crate_path / "Cargo.toml", _generate_cargo_toml(spec))
-    _write_file(spec.crate_path / "src/lib.rs", _generate_lib_rs(spec))
-    _write_file(spec.crate_path / "src/wrapper.cpp", _generate_wrapper_cpp(spec))
-    _build_verilator_library(spec)
+    _write_files(
+        [
+            (spec.crate_path / "Cargo.toml", _generate_cargo_toml(spec)),
+            (spec.crate_path / "src/lib.rs", _generate_lib_rs(spec)),
+            (spec.crate_path / "src/wrapper.cpp", _generate_wrapper_cpp(spec)),
+        ],
+        # The spec constructors already created the crate and its src/ directory.
+        ensure_parents=False,
+    )
+    _build_verilator_library(spec, runtime_objects)
+
+
+def _emit_crate_group(specs: List[ExternalFFIModule], runtime_objects: List[Path]) -> None:
+    for spec in specs:
+        _emit_crate_artifacts(spec, runtime_objects)
+
+
+def _emit_all_crate_artifacts(specs: List[ExternalFFIModule], verilator_root: Path) -> None:
+    """Emit every crate, running the independent native builds concurrently."""
+    if not specs:
+        return
+    # The runtime is identical for every crate, so it is compiled once up front.
+    runtime_objects = _build_verilator_runtime(verilator_root, specs)
+    # Specs that resolve to the same crate directory are emitted in order by one worker.
+    groups: Dict[Path, List[ExternalFFIModule]] = {}
+    for spec in specs:
+        groups.setdefault(spec.crate_path, []).append(spec)
+    if len(groups) <= 1:
+        for group in groups.values():
+            _emit_crate_group(group, runtime_objects)
+        return
+    # Each group owns a disjoint crate directory and the time goes to Verilator and
+    # the C++ compiler, so threads suffice; map re-raises the first failure.
+    with ThreadPoolExecutor(max_workers=min(len(groups), os.cpu_count() or 1)) as pool:
+        emit = functools.partial(_emit_crate_group, runtime_objects=runtime_objects)
+        list(pool.map(emit, groups.values()))
+
+
+def _design_key(spec: ExternalFFIModule) -> str:
+    """Fingerprint the design a spec builds, independent of its logical name.
+
+    Only the top SV file is hashed. That is the whole design: the spec
+    constructors copy that one file into ``rtl/`` and Verilator is run on it
+    alone, so designs split across files are not supported by this path.
+    """
+    sv_bytes = (spec.crate_path / spec.sv_rel_path).read_bytes()
+    ports = [
+        (port.name, port.direction, port.bits, port.signed)
+        for port in itertools.chain(spec.inputs, spec.outputs)
+    ]
+    design = [
+        hashlib.sha256(sv_bytes).hexdigest(),
+        spec.top_module,
+        ports,
+        spec.has_clock,
+        spec.has_reset,
+        spec.opt_level,
+        spec.threads,
+    ]
+    return hashlib.sha256(json.dumps(design).encode("utf-8")).hexdigest()
+
+
+def _emit_shared_designs(
+    specs: List[ExternalFFIModule], verilator_root: Path
+) -> List[ExternalFFIModule]:
+    """Build one crate per distinct design and point duplicate specs at it.
+
+    Returns ``specs`` in order, with every duplicate replaced by a copy of the
+    first spec of its design that keeps the duplicate's ``original_module_name``.
+    """
+    canonical: Dict[str, ExternalFFIModule] = {}
+    owners = [canonical.setdefault(_design_key(spec), spec) for spec in specs]
+    _emit_all_crate_artifacts(list(canonical.values()), verilator_root)
+
+    shared: List[ExternalFFIModule] = []
+    for spec, owner in zip(specs, owners):
+        if owner is spec:
+            shared.append(spec)
+            continue
+        # The duplicate's own crate directory is never built.
+        if spec.crate_path != owner.crate_path:
+            shutil.rmtree(spec.crate_path, ignore_errors=True)
+        shared.append(replace(owner, original_module_name=spec.original_module_name))
+    return shared
 
 
 def _write_manifest_file(
@@ -812,13 +1000,19 @@ def _write_manifest_file(
 ) -> None:
     """Write the manifest describing generated external modules."""
     manifest = {"modules": [_spec_manifest_entry(spec, root) for spec in specs]}
-    _write_file(manifest_path, json.dumps(manifest, indent=2))
+    if orjson is not None:
+        data = orjson.dumps(manifest, option=orjson.OPT_INDENT_2)  # pylint: disable=no-member
+    else:
+        # orjson writes non-ASCII characters as UTF-8; match it byte for byte.
+        data = json.dumps(manifest, indent=2, ensure_ascii=False).encode("utf-8")
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    write_if_changed(manifest_path, data)
 
 
 def _record_used_name_hints(
     specs: Iterable[ExternalFFIModule],
-    used_crate_names: Dict[str, int],
-    used_dynlib_names: Dict[str, int],
+    used_crate_names: Counter[str],
+    used_dynlib_names: Counter[str],
 ) -> None:
     """Record name prefixes to avoid clashes when creating additional specs."""
     for spec in specs:
@@ -828,13 +1022,26 @@ def _record_used_name_hints(
         used_dynlib_names[dynlib_base] = 0
 
 
-def _generate_class_crates(
+def _prune_stale_crates(verilator_root: Path, specs: Iterable[ExternalFFIModule]) -> None:
+    """Remove entries of ``verilator_root`` that no current spec generates."""
+    keep = {spec.crate_path.name for spec in specs}
+    keep.add(_RUNTIME_DIR_NAME)
+    for entry in verilator_root.iterdir():
+        if entry.name in keep:
+            continue
+        if entry.is_dir() and not entry.is_symlink():
+            shutil.rmtree(entry, ignore_errors=True)
+        else:
+            entry.unlink()
+
+
+def _create_class_specs(
     external_classes: Iterable[type],
     verilator_root: Path,
-    used_crate_names: Dict[str, int],
-    used_dynlib_names: Dict[str, int],
+    used_crate_names: Counter[str],
+    used_dynlib_names: Counter[str],
 ) -> List[ExternalFFIModule]:
-    """Create and build crates for ExternalSV classes referenced by intrinsics."""
+    """Create crate specs for ExternalSV classes referenced by intrinsics."""
     specs: List[ExternalFFIModule] = []
     for external_class in external_classes:
         metadata = external_class.metadata()
@@ -843,33 +1050,45 @@ def _generate_class_crates(
         spec = _create_external_spec_from_class(
             external_class, verilator_root, used_crate_names, used_dynlib_names
         )
-        _emit_crate_artifacts(spec)
         specs.append(spec)
     return specs
 
 
-def generate_external_sv_crates(
+def _create_module_specs(
     modules: Iterable[ExternalSV],
-    simulator_root: Path,
     verilator_root: Path,
+    used_crate_names: Counter[str],
+    used_dynlib_names: Counter[str],
 ) -> List[ExternalFFIModule]:
-    """Generate Verilator FFI crates for the provided ExternalSV modules."""
-
+    """Create crate specs for ExternalSV module instances that name a source file."""
     specs: List[ExternalFFIModule] = []
-    used_crate_names: Dict[str, int] = {}
-    used_dynlib_names: Dict[str, int] = {}
-
-    shutil.rmtree(verilator_root, ignore_errors=True)
-    verilator_root.mkdir(parents=True, exist_ok=True)
-
     for module in modules:
         if not getattr(module, "file_path", None):
             continue
         spec = _create_external_spec(module, verilator_root, used_crate_names, used_dynlib_names)
-        _emit_crate_artifacts(spec)
         specs.append(spec)
+    return specs
+
+
+def generate_external_sv_crates(
+    modules: Iterable[ExternalSV],
+    simulator_root: Path,
+    verilator_root: Path,
+    write_manifest: bool = True,
+) -> List[ExternalFFIModule]:
+    """Generate Verilator FFI crates for the provided ExternalSV modules.
+
+    Pass ``write_manifest=False`` when the caller writes a combined manifest itself.
+    """
+
+    # Existing crates are kept so unchanged sources are not rewritten;
+    # emit_external_sv_ffis prunes the ones that are no longer generated.
+    verilator_root.mkdir(parents=True, exist_ok=True)
+
+    specs = _create_module_specs(modules, verilator_root, Counter(), Counter())
+    specs = _emit_shared_designs(specs, verilator_root)
 
-    if specs:
+    if specs and write_manifest:
         _write_manifest_file(simulator_root / "external_modules.json", specs, simulator_root)
 
     return specs
@@ -885,46 +1104,52 @@ def emit_external_sv_ffis(
     # pylint: disable=import-outside-toplevel
     from .external import collect_external_classes, collect_external_intrinsics
 
-    # Collect ExternalSV module instances
-    modules = [
-        module
-        for module in getattr(sys_module, "modules", []) + getattr(sys_module, "downstreams", [])
-        if isinstance(module, ExternalSV)
-    ]
+    # Collect ExternalSV module instances; most systems have none, so probe first
+    # and only build the list once a match is found.
+    all_modules = getattr(sys_module, "modules", []), getattr(sys_module, "downstreams", [])
+    modules = []
+    if any(isinstance(module, ExternalSV) for module in itertools.chain(*all_modules)):
+        modules = [
+            module for module in itertools.chain(*all_modules) if isinstance(module, ExternalSV)
+        ]
 
     # Collect ExternalSV classes used by ExternalIntrinsics
     external_intrinsics = collect_external_intrinsics(sys_module)
     external_classes = collect_external_classes(external_intrinsics)
 
     if not modules and not external_classes:
-        shutil.rmtree(verilator_root, ignore_errors=True)
+        if verilator_root.is_dir():
+            shutil.rmtree(verilator_root, ignore_errors=True)
         sys_module._external_ffi_specs = {}  # pylint: disable=protected-access
         config["external_ffis"] = []
         return []
 
-    # Clean and prepare verilator root
-    shutil.rmtree(verilator_root, ignore_errors=True)
     verilator_root.mkdir(parents=True, exist_ok=True)
 
     ffi_specs = []
-    used_crate_names: Dict[str, int] = {}
-    used_dynlib_names: Dict[str, int] = {}
+    used_crate_names: Counter[str] = Counter()
+    used_dynlib_names: Counter[str] = Counter()
 
-    # Generate FFI crates for module instances
+    # Name every crate up front (names must be allocated in order), then build
+    # module-instance and class crates together in one pool.
     if modules:
-        module_specs = generate_external_sv_crates(modules, simulator_path, verilator_root)
+        module_specs = _create_module_specs(modules, verilator_root, Counter(), Counter())
         ffi_specs.extend(module_specs)
         _record_used_name_hints(module_specs, used_crate_names, used_dynlib_names)
 
-    # Generate FFI crates for ExternalSV classes
     if external_classes:
-        class_specs = _generate_class_crates(
-            external_classes.values(),
-            verilator_root,
-            used_crate_names,
-            used_dynlib_names,
+        ffi_specs.extend(
+            _create_class_specs(
+                external_classes.values(),
+                verilator_root,
+                used_crate_names,
+                used_dynlib_names,
+            )
         )
-        ffi_specs.extend(class_specs)
+
+    ffi_specs = _emit_shared_designs(ffi_specs, verilator_root)
+
+    _prune_stale_crates(verilator_root, ffi_specs)
 
     if ffi_specs:
         _write_manifest_file(simulator_path / "external_modules.json", ffi_specs, simulator_path)
@@ -188,7 +188,7 @@ class CIRCTDumper(Visitor):  # pylint: disable=too-many-instance-attributes,too-
         self.append_code(f'# {expr}')
 
         # Add location comment if available
-        if hasattr(expr, 'loc') and expr.loc:
+        if expr.loc:
             self.append_code(f'#{expr.loc}')
 
         # Delegate to the expression code generator
@@ -70,7 +70,7 @@ def _copy_alias_resources(resource_path: Path, destination: Path, alias_resource
         content = source_file.read_text(encoding='utf-8')
         base_module = Path(base_file).stem
         alias_content = content.replace(f"module {base_module}", f"module {alias_module}", 1)
-        alias_path.write_text(alias_content, encoding='utf-8')
+        alias_path.write_bytes(alias_content.encode('utf-8'))
         print(f"Copied {source_file} to {alias_path}")
 
 
@@ -148,8 +148,8 @@ endmodule
 '''
 
         filename = os.path.join(path, f'sram_blackbox_{array_name}.sv')
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(verilog_code)
+        with open(filename, 'wb') as f:
+            f.write(verilog_code.encode('utf-8'))
 
 
 def _sv_literal_for_initializer(value: int, width: int) -> str:
@@ -249,7 +249,7 @@ def generate_register_file_sv_files(sys: SysBuilder, path: Path) -> List[str]:
         lines.append("")
 
         out_path = path / f"{module_name}.sv"
-        out_path.write_text("\n".join(lines), encoding="utf-8")
+        out_path.write_bytes("\n".join(lines).encode("utf-8"))
         generated.append(out_path.name)
 
     return generated
@@ -160,6 +160,7 @@ def external(cls):
         'module_name': getattr(cls, '__module_name__', cls.__name__),
         'has_clock': getattr(cls, '__has_clock__', False),
         'has_reset': getattr(cls, '__has_reset__', False),
+        'threads': getattr(cls, '__threads__', 1),
     })
 
     return cls
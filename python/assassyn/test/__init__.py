@@ -17,7 +17,7 @@ def run_test(name: str, top: callable, checker: callable, **kwargs):
         top: Callable that builds the system (receives no args or sys, uses sys context)
         checker: Callable that validates simulator output (receives raw string)
         **config: Additional config passed to elaborate()
-            (e.g., sim_threshold, idle_threshold, random)
+            (e.g., sim_threshold, idle_threshold, random, pretty_printer)
     """
     # Generate unique system name to avoid conflicts in parallel test execution
     sys = SysBuilder(name)
@@ -34,6 +34,8 @@ def run_test(name: str, top: callable, checker: callable, **kwargs):
         kwargs['verilog'] = utils.has_verilator()
     if 'enable_cache' not in kwargs:
         kwargs['enable_cache'] = False
+    if 'pretty_printer' not in kwargs:
+        kwargs['pretty_printer'] = False
     cfg = config()
     cfg.update(kwargs)
 
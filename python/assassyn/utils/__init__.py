@@ -3,6 +3,8 @@
 from __future__ import annotations
 
 # Standard library imports
+import atexit
+import functools
 import os
 import subprocess
 import sys
@@ -16,6 +18,14 @@ from .enforce_type import enforce_type, validate_arguments, check_type
 # Cache coordination data between elaborate() and build_simulator()
 CACHE_PENDING: tuple[str, str, str] | None = None
 
+# Background `cargo fmt` processes started by the simulator elaborate(); cargo
+# invocations below wait for them so they never read a half-formatted crate.
+FORMAT_PENDING: list[subprocess.Popen] = []
+
+# Numbered FIFO/trigger_counter instantiations that patch_fifo folds back to the
+# shared module name, matched in a single pass over Top.sv.
+_NUMBERED_INSTANCE_RE = re.compile(r'(fifo|trigger_counter)_\d+\s*#\s*\(')
+
 def identifierize(obj):
     '''The helper function to get the identifier of the given object. You can change `id_slice`
     to tune the length of the identifier. The default is slice(-6:-1).'''
@@ -80,22 +90,25 @@ def patch_fifo(file_path):
     with open(file_path, 'r', encoding='utf-8') as f:
         content = f.read()
 
-    patterns = [
-        (re.compile(r'fifo_\d+\s*#\s*\('), 'fifo #('),
-        (re.compile(r'trigger_counter_\d+\s*#\s*\('), 'trigger_counter #('),
-    ]
+    content, num_replacements = _NUMBERED_INSTANCE_RE.subn(r'\1 #(', content)
 
-    modified = False
-    for pattern, replacement in patterns:
-        content, num_replacements = pattern.subn(replacement, content)
-        if num_replacements > 0:
-            modified = True
-
-    if modified:
+    if num_replacements:
         with open(file_path, 'w', encoding='utf-8') as f:
             f.write(content)
 
 
+def wait_pending_format():
+    """Block until every background `cargo fmt` started by elaboration exits."""
+    while FORMAT_PENDING:
+        if FORMAT_PENDING.pop().wait() != 0:
+            print("Warning: Failed to format code with cargo fmt")
+
+
+# An elaboration that is never built or run still reaps its formatter, so fmt
+# failures are reported and no Popen handle outlives the interpreter.
+atexit.register(wait_pending_format)
+
+
 def get_simulator_binary_path(manifest_path):
     '''Get the path to the compiled simulator binary.
 
@@ -146,6 +159,8 @@ def build_simulator(manifest_path, offline=False):
         print(f"[Cache] Using cached binary: {manifest_path}")
         return manifest_path
 
+    wait_pending_format()
+
     def _build(off):
         cmd = ['cargo', 'build', '--release', '--manifest-path', manifest_path]
         if off:
@@ -196,6 +211,8 @@ def run_simulator(manifest_path=None, offline=False, release=True, binary_path=N
         return _cmd_wrapper([binary_path])
 
     # Fall back to cargo run
+    wait_pending_format()
+
     def _run(off):
         cmd = ['cargo', 'run', '--manifest-path', manifest_path]
         if off:
@@ -282,6 +299,7 @@ def create_dir(dir_path: str) -> None:
     """
     os.makedirs(dir_path, exist_ok=True)
 
+@functools.lru_cache(maxsize=4096)
 def namify(name: str) -> str:
     """Convert a name to a valid identifier.
 
@@ -337,6 +355,7 @@ __all__ = [
     'patch_fifo', 'run_simulator', 'build_simulator', 'get_simulator_binary_path',
     'run_verilator', 'parse_verilator_cycle',
     'parse_simulator_cycle', 'has_verilator', 'create_dir', 'namify',
+    'wait_pending_format',
     # Build caching
     'check_build_cache', 'save_build_cache'
 ]
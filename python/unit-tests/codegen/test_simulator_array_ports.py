@@ -0,0 +1,97 @@
+"""Write-port allocation for arrays in the generated Rust simulator."""
+
+import os
+import re
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from assassyn.frontend import (  # type: ignore
+    Module,
+    Port,
+    RegArray,
+    SysBuilder,
+    UInt,
+    module,
+)
+from assassyn.backend import config as default_config  # type: ignore
+from assassyn.codegen.simulator import elaborate  # type: ignore
+from assassyn.utils import namify  # type: ignore
+
+
+class Writer(Module):  # type: ignore[misc]
+
+    def __init__(self):
+        super().__init__(ports={'value': Port(UInt(8))})
+
+    @module.combinational
+    def build(self, target):
+        value = self.pop_all_ports(True)
+        target[0] = value
+
+
+class Driver(Module):  # type: ignore[misc]
+
+    def __init__(self):
+        super().__init__(ports={})
+
+    @module.combinational
+    def build(self, writers):
+        cnt = RegArray(UInt(8), 1)
+        cnt[0] = cnt[0] + UInt(8)(1)
+        for writer in writers:
+            writer.async_called(value=cnt[0])
+
+
+def _build_multi_writer_system(name: str, num_writers: int):
+    """Return a system whose array is written by *num_writers* modules, and its name."""
+    sys_builder = SysBuilder(name)
+    with sys_builder:
+        shared = RegArray(UInt(8), 4, name="shared")
+        writers = [Writer() for _ in range(num_writers)]
+        for writer in writers:
+            writer.build(shared)
+        Driver().build(writers)
+    return sys_builder, namify(shared.name)
+
+
+def _generate(sys_builder: SysBuilder, tmp_path):
+    """Elaborate *sys_builder* and return (simulator.rs, concatenated module sources)."""
+    cfg = default_config(path=str(tmp_path), pretty_printer=False)
+    elaborate(sys_builder, **cfg)
+    src = tmp_path / f"{sys_builder.name}_simulator" / "src"
+    modules = "".join(
+        path.read_text(encoding="utf-8") for path in sorted((src / "modules").glob("*.rs"))
+    )
+    return (src / "simulator.rs").read_text(encoding="utf-8"), modules
+
+
+def test_multi_writer_array_port_count(tmp_path):
+    """Every writer gets its own port and the array is sized for all of them."""
+
+    sys_builder, array = _build_multi_writer_system("multi_writer_ports", 3)
+    simulator_rs, modules_rs = _generate(sys_builder, tmp_path)
+
+    assert f"{array} : Array::new_with_ports(4, 3)," in simulator_rs
+    writes = re.findall(rf"sim\.{array}\.write\((\d+), write\)", modules_rs)
+    ports = sorted(int(idx) for idx in writes)
+    assert ports == [0, 1, 2]
+
+
+def test_port_analysis_is_per_system():
+    """A second system on the same port manager must be analysed on its own."""
+
+    # pylint: disable=import-outside-toplevel
+    from assassyn.codegen.simulator.port_mapper import reset_port_manager
+    from assassyn.codegen.simulator.simulator import analyze_and_register_ports
+
+    reset_port_manager()
+    first, _ = _build_multi_writer_system("port_analysis_first", 1)
+    second, array = _build_multi_writer_system("port_analysis_second", 2)
+    analyze_and_register_ports(first)
+    manager, dram_modules = analyze_and_register_ports(second)
+
+    assert dram_modules == []
+    writers = [namify(mod.name) for mod in second.modules if isinstance(mod, Writer)]
+    assert len(writers) == 2
+    assert all((array, writer) in manager.port_map for writer in writers)
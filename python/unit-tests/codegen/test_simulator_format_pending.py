@@ -0,0 +1,49 @@
+"""Background ``cargo fmt`` handles queued by the simulator elaborate()."""
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from assassyn.frontend import Module, RegArray, SysBuilder, UInt, module  # type: ignore
+from assassyn.backend import config as default_config  # type: ignore
+from assassyn.codegen.simulator import elaborate  # type: ignore
+from assassyn import utils  # type: ignore
+
+
+class Counter(Module):  # type: ignore[misc]
+
+    def __init__(self):
+        super().__init__(ports={})
+
+    @module.combinational
+    def build(self):
+        cnt = RegArray(UInt(8), 1)
+        cnt[0] = cnt[0] + UInt(8)(1)
+
+
+class _FinishedFormatter:
+    """Stands in for a Popen handle whose `cargo fmt` failed."""
+
+    def __init__(self):
+        self.waited = False
+
+    def wait(self):
+        self.waited = True
+        return 1
+
+
+def test_elaborate_drains_earlier_formatters(tmp_path, capsys):
+    """A formatter from an earlier elaboration is reaped, and its failure reported, first."""
+
+    sys_builder = SysBuilder("format_pending_drain")
+    with sys_builder:
+        Counter().build()
+
+    pending = _FinishedFormatter()
+    utils.FORMAT_PENDING.append(pending)
+    elaborate(sys_builder, **default_config(path=str(tmp_path), pretty_printer=False))
+
+    assert pending.waited
+    assert not utils.FORMAT_PENDING
+    assert "Failed to format code with cargo fmt" in capsys.readouterr().out
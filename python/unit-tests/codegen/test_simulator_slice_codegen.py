@@ -0,0 +1,51 @@
+"""Slice masks emitted by the Rust simulator generator."""
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from assassyn.frontend import Module, RegArray, SysBuilder, UInt, log, module  # type: ignore
+from assassyn.backend import config as default_config  # type: ignore
+from assassyn.codegen.simulator import elaborate  # type: ignore
+
+# (low, high) bit ranges, inclusive on both ends.
+SLICES = [(3, 3), (0, 31), (0, 63), (60, 127)]
+
+
+class Slicer(Module):  # type: ignore[misc]
+
+    def __init__(self):
+        super().__init__(ports={})
+
+    @module.combinational
+    def build(self):
+        wide = RegArray(UInt(128), 1)
+        wide[0] = wide[0] + UInt(128)(1)
+        value = wide[0]
+        for low, high in SLICES:
+            log("slice: {}", value[low:high])
+
+
+def _module_sources(tmp_path) -> str:
+    sys_builder = SysBuilder("slice_masks")
+    with sys_builder:
+        Slicer().build()
+    elaborate(sys_builder, **default_config(path=str(tmp_path), pretty_printer=False))
+    modules_dir = tmp_path / "slice_masks_simulator" / "src" / "modules"
+    return "".join(path.read_text(encoding="utf-8") for path in sorted(modules_dir.glob("*.rs")))
+
+
+def test_slice_masks(tmp_path):
+    """Narrow slices use u64 literals; slices reaching past bit 63 use big-endian bytes."""
+
+    source = _module_sources(tmp_path)
+
+    assert "let mask: u64 = 0x1u64;\n                let res = (a >> 3) & mask;" in source
+    assert "let mask: u64 = 0xffffffffu64;\n                let res = (a >> 0) & mask;" in source
+    assert "let mask: u64 = 0xffffffffffffffffu64;" in source
+
+    # 68 bits: a 0x0f high byte followed by eight 0xff bytes.
+    wide_mask = ", ".join(["0x0f"] + ["0xff"] * 8)
+    assert f"let mask = BigUint::from_bytes_be(&[{wide_mask}]);" in source
+    assert "let res = (a >> 60) & mask;" in source
@@ -0,0 +1,246 @@
+"""Verilator FFI crate generation and reuse in the simulator backend."""
+
+import json
+import os
+import re
+import sys
+from types import SimpleNamespace
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from assassyn.frontend import (  # type: ignore
+    Downstream,
+    ExternalSV,
+    Module,
+    RegArray,
+    SysBuilder,
+    UInt,
+    WireIn,
+    WireOut,
+    downstream,
+    external,
+    log,
+    module,
+)
+from assassyn.backend import config as default_config  # type: ignore
+from assassyn.codegen.simulator import elaborate  # type: ignore
+from assassyn.codegen.simulator import verilator  # type: ignore
+
+
+@external
+class WorkspaceAdder(ExternalSV):  # type: ignore[misc]
+    '''External SystemVerilog adder used to exercise the FFI crate path.'''
+
+    a: WireIn[UInt(32)]
+    b: WireIn[UInt(32)]
+    c: WireOut[UInt(32)]
+
+    __source__: str = "python/ci-tests/resources/adder.sv"
+    __module_name__: str = "adder"
+
+
+@external
+class LeftAdder(ExternalSV):  # type: ignore[misc]
+    '''Same RTL as RightAdder, declared as a separate class.'''
+
+    a: WireIn[UInt(32)]
+    b: WireIn[UInt(32)]
+    c: WireOut[UInt(32)]
+
+    __source__: str = "python/ci-tests/resources/adder.sv"
+    __module_name__: str = "adder"
+
+
+@external
+class RightAdder(ExternalSV):  # type: ignore[misc]
+    '''Same RTL as LeftAdder, declared as a separate class.'''
+
+    a: WireIn[UInt(32)]
+    b: WireIn[UInt(32)]
+    c: WireOut[UInt(32)]
+
+    __source__: str = "python/ci-tests/resources/adder.sv"
+    __module_name__: str = "adder"
+
+
+class Driver(Module):  # type: ignore[misc]
+
+    def __init__(self):
+        super().__init__(ports={})
+
+    @module.combinational
+    def build(self):
+        cnt = RegArray(UInt(32), 1)
+        cnt[0] = cnt[0] + UInt(32)(1)
+        return cnt[0]
+
+
+class Sum(Downstream):  # type: ignore[misc]
+
+    def __init__(self):
+        super().__init__()
+
+    @downstream.combinational
+    def build(self, value):
+        value = value.optional(UInt(32)(1))
+        adder = WorkspaceAdder(a=value, b=value)
+        log("sum: {}", adder.c)
+
+
+class PairSum(Downstream):  # type: ignore[misc]
+
+    def __init__(self):
+        super().__init__()
+
+    @downstream.combinational
+    def build(self, value):
+        value = value.optional(UInt(32)(1))
+        left = LeftAdder(a=value, b=value)
+        right = RightAdder(a=value, b=value)
+        log("sums: {} {}", left.c, right.c)
+
+
+def _build_system(name: str) -> SysBuilder:
+    sys_builder = SysBuilder(name)
+    with sys_builder:
+        value = Driver().build()
+        Sum().build(value)
+    return sys_builder
+
+
+def _fake_toolchain(tmp_path, monkeypatch):
+    """Point the generator at a stub Verilator install and record every command.
+
+    The recorded commands produce their ``-o`` output so build caches can hit.
+    """
+    include_dir = tmp_path / "fake_verilator" / "include"
+    (include_dir / "vltstd").mkdir(parents=True)
+    (include_dir / "verilated.h").write_text("", encoding="utf-8")
+    (include_dir / "verilated.cpp").write_text("", encoding="utf-8")
+    monkeypatch.setenv("VERILATOR_ROOT", str(include_dir.parent))
+    monkeypatch.setenv("CXX", "c++")
+
+    commands = []
+
+    def run(cmd, cwd=None):  # pylint: disable=unused-argument
+        commands.append(list(cmd))
+        if "-o" in cmd:
+            output = cmd[cmd.index("-o") + 1]
+            with open(output, "wb"):
+                pass
+
+    monkeypatch.setattr(verilator, "_run_subprocess", run)
+    return commands
+
+
+def _elaborate(sys_builder: SysBuilder, tmp_path) -> None:
+    cfg = default_config(path=str(tmp_path / "workspace"), pretty_printer=False)
+    elaborate(sys_builder, **cfg)
+
+
+def test_second_elaboration_keeps_verilator_crates(tmp_path, monkeypatch):
+    """Discarding the simulator directory must not take the FFI crates with it."""
+
+    _fake_toolchain(tmp_path, monkeypatch)
+    sys_builder = _build_system("verilator_workspace_reuse")
+
+    _elaborate(sys_builder, tmp_path)
+    verilator_root = tmp_path / "workspace" / "verilator_workspace_reuse_verilator"
+    crates = sorted(verilator_root.glob("verilated_*"))
+    assert crates, "expected a Verilator crate for the external adder"
+    marker = crates[0] / "marker"
+    marker.write_text("kept", encoding="utf-8")
+
+    _elaborate(sys_builder, tmp_path)
+    assert marker.read_text(encoding="utf-8") == "kept"
+
+
+def test_second_elaboration_skips_native_build(tmp_path, monkeypatch):
+    """An unchanged design must reuse its library instead of rerunning the toolchain."""
+
+    commands = _fake_toolchain(tmp_path, monkeypatch)
+    sys_builder = _build_system("verilator_build_cache")
+
+    _elaborate(sys_builder, tmp_path)
+    assert any(cmd[0] == "verilator" for cmd in commands)
+    assert any("-shared" in cmd for cmd in commands)
+
+    commands.clear()
+    _elaborate(sys_builder, tmp_path)
+    assert not commands, f"unexpected rebuild: {commands}"
+
+
+def test_runtime_follows_crate_thread_flags(tmp_path, monkeypatch):
+    """A threaded crate must get a runtime compiled with -pthread, not a cached one."""
+
+    commands = _fake_toolchain(tmp_path, monkeypatch)
+    verilator_root = tmp_path / "verilator"
+    # pylint: disable=protected-access
+    verilator._build_verilator_runtime(verilator_root, [SimpleNamespace(threads=1)])
+    assert commands and all("-pthread" not in cmd for cmd in commands)
+
+    commands.clear()
+    verilator._build_verilator_runtime(verilator_root, [SimpleNamespace(threads=1)])
+    assert not commands
+
+    verilator._build_verilator_runtime(
+        verilator_root, [SimpleNamespace(threads=1), SimpleNamespace(threads=4)]
+    )
+    assert commands and all("-pthread" in cmd for cmd in commands)
+
+
+def test_identical_designs_share_one_crate(tmp_path, monkeypatch):
+    """Two classes over the same RTL build once but keep separate simulator handles."""
+
+    commands = _fake_toolchain(tmp_path, monkeypatch)
+    sys_builder = SysBuilder("verilator_shared_design")
+    with sys_builder:
+        value = Driver().build()
+        PairSum().build(value)
+    _elaborate(sys_builder, tmp_path)
+
+    workspace = tmp_path / "workspace"
+    simulator = workspace / "verilator_shared_design_simulator"
+    manifest = json.loads((simulator / "external_modules.json").read_text(encoding="utf-8"))
+    entries = manifest["modules"]
+    assert len(entries) == 2
+    assert len({entry["crate"] for entry in entries}) == 1
+    crate = entries[0]["crate"]
+
+    cargo_toml = (simulator / "Cargo.toml").read_text(encoding="utf-8")
+    assert len(re.findall(rf"^{crate} = ", cargo_toml, re.MULTILINE)) == 1
+    verilator_root = workspace / "verilator_shared_design_verilator"
+    assert [path.name for path in verilator_root.glob("verilated_*")] == [crate]
+    assert sum(cmd[0] == "verilator" for cmd in commands) == 1
+
+    # Each instance owns a field constructed through its own new() call, and the
+    # wrapper allocates a fresh model per call, so the two do not share state.
+    simulator_rs = (simulator / "src" / "simulator.rs").read_text(encoding="utf-8")
+    handles = re.findall(rf"(external_\w+) : {crate}::\w+::new\(\),", simulator_rs)
+    assert len(set(handles)) == 2
+    wrapper = (verilator_root / crate / "src" / "wrapper.cpp").read_text(encoding="utf-8")
+    assert "return new ModuleHandle();" in wrapper
+
+
+def test_manifest_bytes_do_not_depend_on_orjson(tmp_path, monkeypatch):
+    """The json fallback must write the same bytes as orjson, non-ASCII paths included."""
+
+    crate_path = tmp_path / "wörkspace" / "verilated_adder"
+    spec = verilator.ExternalFFIModule(
+        crate_name="verilated_adder",
+        crate_path=crate_path,
+        symbol_prefix="verilated_adder",
+        dynamic_lib_name="verilated_adder_ffi",
+        top_module="adder",
+        sv_filename="adder.sv",
+        sv_rel_path="rtl/adder.sv",
+        lib_path=crate_path / "libverilated_adder_ffi.so",
+    )
+    # pylint: disable=protected-access
+    verilator._write_manifest_file(tmp_path / "fast.json", [spec], tmp_path)
+    monkeypatch.setattr(verilator, "orjson", None)
+    verilator._write_manifest_file(tmp_path / "fallback.json", [spec], tmp_path)
+
+    fallback = (tmp_path / "fallback.json").read_bytes()
+    assert "wörkspace".encode("utf-8") in fallback
+    assert (tmp_path / "fast.json").read_bytes() == fallback
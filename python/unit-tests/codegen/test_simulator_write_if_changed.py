@@ -0,0 +1,58 @@
+"""Behaviour of the simulator backend's write_if_changed helper."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from assassyn.codegen.simulator.utils import write_if_changed  # type: ignore
+
+
+def _age(path, seconds=100):
+    """Move the mtime of *path* into the past and return the new value."""
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns - seconds * 10**9))
+    return path.stat().st_mtime_ns
+
+
+def test_identical_file_keeps_mtime(tmp_path):
+    """Identical bytes leave the file, its mtime and the directory untouched."""
+    target = tmp_path / "lib.rs"
+    target.write_bytes(b"fn main() {}\n")
+    mtime = _age(target)
+
+    write_if_changed(target, b"fn main() {}\n")
+
+    assert target.stat().st_mtime_ns == mtime
+    assert list(tmp_path.iterdir()) == [target]
+
+
+@pytest.mark.parametrize("data", [b"fn main() { run(); }\n", b"fn main() {}\r\n"])
+def test_changed_file_is_replaced(tmp_path, data):
+    """Both a size change and a same-size content change are written."""
+    target = tmp_path / "lib.rs"
+    target.write_bytes(b"fn main() {}\n\n")
+    mtime = _age(target)
+
+    write_if_changed(target, data)
+
+    assert target.read_bytes() == data
+    assert target.stat().st_mtime_ns != mtime
+    assert list(tmp_path.iterdir()) == [target]
+
+
+def test_missing_file_is_created(tmp_path):
+    """A file that does not exist yet is created in an existing directory."""
+    target = tmp_path / "main.rs"
+    write_if_changed(target, b"mod modules;\n")
+    assert target.read_bytes() == b"mod modules;\n"
+
+
+def test_missing_parent_directory_raises(tmp_path):
+    """Callers own directory creation; nothing is written when the parent is absent."""
+    target = tmp_path / "src" / "main.rs"
+    with pytest.raises(FileNotFoundError):
+        write_if_changed(target, b"mod modules;\n")
+    assert not (tmp_path / "src").exists()